@@ -0,0 +1,170 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+from config import OUTPUT_DIR
+from utils.generator import PersonGenerator
+from utils.metrics import peak_memory_mb
+from utils.models import FileFormat
+from utils.packer import PackerZip
+from utils.packer_7z import Packer7z
+from utils.runner import get_file_creator
+
+BENCHMARK_FILENAME = 'benchmark'
+DEFAULT_ROWS = [10_000, 200_000, 2_000_000]
+PART_MAX_SIZE_MB = 10
+TARGETS = {
+    'file': None,
+    'buffer': None,
+    'zip': PackerZip,
+    '7z': Packer7z,
+    '7z-parts': Packer7z,
+}
+
+
+def _output_size(prefix: str) -> int:
+    """Helper function. Total size of output files with the prefix."""
+    return sum(
+        entry.stat().st_size
+        for entry in os.scandir(OUTPUT_DIR)
+        if entry.name.startswith(prefix)
+    )
+
+
+def _cleanup(prefix: str) -> None:
+    """Helper function. Remove output files with the prefix."""
+    for entry in os.scandir(OUTPUT_DIR):
+        if entry.name.startswith(prefix):
+            os.remove(entry.path)
+
+
+def run_case(file_format: FileFormat, target: str, rows: int) -> dict:
+    """
+    Run one benchmark case. Intended to run in a fresh process,
+    so the peak memory belongs to this case only.
+    :param file_format: Format of the data file.
+    :param target: One of TARGETS.
+    :param rows: Number of generated rows.
+    :return: Metrics of the case.
+    """
+    person_generator = PersonGenerator()
+    data_file = get_file_creator(file_format)
+    inner_file_format = data_file.EXTENSION
+    prefix = f'{BENCHMARK_FILENAME}-{os.getpid()}'
+
+    start = time.perf_counter()
+    data = person_generator.generate_random_to_generator(rows)
+    if target == 'file':
+        data_file(data, prefix).create()
+        data_size = _output_size(prefix)
+    else:
+        buffer = data_file(data).create()
+        data_size = buffer.getbuffer().nbytes
+        packer = TARGETS[target]
+        if target == '7z-parts':
+            packer(
+                data=buffer,
+                archive_filename=prefix,
+                max_size_mb=PART_MAX_SIZE_MB,
+                inner_file_format=inner_file_format
+            ).create_one_archive_from_parts(delete_after=True)
+        elif packer:
+            packer(
+                buffer, prefix, inner_file_format=inner_file_format
+            ).create_archive()
+    seconds = time.perf_counter() - start
+    output_size = _output_size(prefix) if target != 'buffer' else data_size
+    _cleanup(prefix)
+
+    return {
+        'file_format': file_format.name.lower(),
+        'target': target,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds, 1),
+        'mb_per_sec': round(data_size / 1024 / 1024 / seconds, 3),
+        'data_mb': round(data_size / 1024 / 1024, 3),
+        'output_mb': round(output_size / 1024 / 1024, 3),
+        'peak_memory_mb': peak_memory_mb(),
+    }
+
+
+def run_benchmark(rows_list: list[int]) -> list[dict]:
+    """
+    Run all combinations of file formats, targets and row counts.
+    :param rows_list: Row counts to benchmark.
+    :return: Metrics of every case.
+    """
+    results = []
+    for rows in rows_list:
+        for file_format in FileFormat:
+            for target in TARGETS:
+                with concurrent.futures.ProcessPoolExecutor(1) as executor:
+                    result = executor.submit(
+                        run_case, file_format, target, rows
+                    ).result()
+                print(
+                    f'{result["file_format"]:>5} {target:>8} {rows:>9} rows: '
+                    f'{result["rows_per_sec"]:>10} rows/s, '
+                    f'{result["mb_per_sec"]:>8} MB/s, '
+                    f'peak {result["peak_memory_mb"]} MB'
+                )
+                results.append(result)
+    return results
+
+
+def compare(
+        results: list[dict],
+        baseline: list[dict],
+        threshold: float
+) -> list[str]:
+    """
+    Compare results with a saved baseline.
+    :param results: Metrics of the current run.
+    :param baseline: Metrics of the baseline run.
+    :param threshold: Allowed relative slowdown, e.g. 0.1 for 10%.
+    :return: Descriptions of regressed cases.
+    """
+    def key(result):
+        return result['file_format'], result['target'], result['rows']
+
+    baseline_by_key = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get(key(result))
+        if not base:
+            continue
+        ratio = result['rows_per_sec'] / base['rows_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append(
+                f'{"/".join(map(str, key(result)))}: '
+                f'{base["rows_per_sec"]} -> {result["rows_per_sec"]} rows/s '
+                f'({ratio - 1:+.1%})'
+            )
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Замер скорости генерации и архивации'
+    )
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', help='json-файл предыдущего замера')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    results = run_benchmark(args.rows)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f'Регрессия: {regression}')
+        sys.exit(1 if regressions else 0)
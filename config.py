@@ -10,6 +10,7 @@ logger.add('logs/errors.log', format='{time} - {name} - {level} - {message}',
 LOG_DIR = 'logs'
 OUTPUT_DIR = 'output'
 INPUT_DIR = 'input'
+CACHE_DIR = 'cache'
 DIR_NAMES = [
     dir_ for var_, dir_  in globals().items() if var_.endswith('_DIR')
 ]
@@ -19,3 +20,72 @@ INNER_FILENAME = 'output'
 
 TXT_ENCODING = 'utf-8'
 CSV_ENCODING = 'utf-8'
+
+GENERATOR_ENGINE = 'mimesis'
+# Number of processes generating rows of a job: 1 - generation
+# in the thread of the job, None - CPU count. Rows are generated
+# by chunks of GENERATOR_CHUNK_SIZE rows and merged in order.
+GENERATOR_WORKERS = 1
+GENERATOR_CHUNK_SIZE = 50_000
+
+# Mix of locales of generated data, e.g. {'ru': 60, 'en': 25, 'de': 15},
+# None - Locale.RU only. Rows of one locale are generated
+# in batches of LOCALE_BATCH_ROWS rows.
+LOCALE_WEIGHTS = None
+LOCALE_BATCH_ROWS = 1000
+STREAM_CHUNK_ROWS = 10_000
+PIPELINE_QUEUE_SIZE = 8
+
+# Output above MAX_LINES_WITHOUT_SHARDS rows is split into files
+# of SHARD_ROWS rows. Shards by size are written in SHARD_BATCH_ROWS batches.
+MAX_LINES_WITHOUT_SHARDS = 2_000_000
+SHARD_ROWS = 1_000_000
+SHARD_BATCH_ROWS = 1000
+
+# Duplicates of unique columns: 'suffix' or 'resample'.
+UNIQUE_STRATEGY = 'suffix'
+UNIQUE_RESAMPLE_ATTEMPTS = 10
+
+# Entry point groups of third-party file formats and packers.
+FILE_FORMAT_ENTRY_POINTS = 'data_generator.file_formats'
+PACKER_ENTRY_POINTS = 'data_generator.packers'
+
+PACKER_WORKERS = 1
+ZIP_COMPRESSION_LEVEL = None
+PACKER_READ_CHUNK_SIZE = 1024 * 1024
+
+# Check of the written archive before packed sources are deleted.
+# Members are decompressed by VERIFY_WORKERS threads (CPU count by default).
+VERIFY_ARCHIVE = False
+VERIFY_WORKERS = None
+
+# Adaptive compression of packed files: None, 'fastest' or 'smallest'.
+# Files whose sample compresses worse than INCOMPRESSIBLE_RATIO are stored.
+COMPRESSION_POLICY = None
+COMPRESSION_SAMPLE_SIZE = 64 * 1024
+INCOMPRESSIBLE_RATIO = 0.9
+FAST_COMPRESSION_LEVEL = 1
+# 'fastest' 7z archives use zstd instead of LZMA2 preset 1 if pyzstd
+# is installed. Stock 7-Zip cannot extract them, only py7zr or 7-Zip
+# builds with zstd.
+SEVENZIP_ZSTD = False
+
+# Local HTTP service of generated data. Rows are generated by
+# SERVICE_WORKERS processes (CPU count by default) in chunks of
+# SERVICE_CHUNK_ROWS rows, at most SERVICE_PREFETCH_CHUNKS chunks ahead
+# of the client.
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8080
+SERVICE_WORKERS = None
+SERVICE_CHUNK_ROWS = 2000
+SERVICE_PREFETCH_CHUNKS = 4
+SERVICE_MAX_ROWS = 10_000_000
+SERVICE_HEADER_TIMEOUT = 10
+
+# Per-stage metrics of jobs, one json record per job in METRICS_LOG.
+METRICS_ENABLED = False
+METRICS_LOG = 'logs/metrics.log'
+if METRICS_ENABLED:
+    logger.add(METRICS_LOG, format='{message}', level='INFO',
+               filter=lambda record: 'metrics' in record['extra'],
+               rotation='10 MB', compression='zip')
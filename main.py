@@ -1,38 +1,36 @@
+import argparse
 import os
-
-from mimesis import Locale
-
-from config import DIR_NAMES, OUTPUT_FILENAME
-from utils.file_creator import ExcelFileCreator, CsvFileCreator, TxtFileCreator
-from utils.generator import PersonGenerator
-from utils.models import FileFormat, PackerFormat, WorkFormat, PackerType
-from utils.packer import PackerZip, Packer7z
+import time
+
+from config import (
+    DIR_NAMES,
+    GENERATOR_WORKERS,
+    LOCALE_WEIGHTS,
+    SERVICE_HOST,
+    SERVICE_PORT
+)
+from utils.models import WorkFormat, PackerType
+from utils.registry import import_report
+from utils.runner import (
+    run_job,
+    run_jobs,
+    load_jobs,
+    create_generator,
+    parse_locales
+)
 from utils.userdata import UserData
 
-FILE_CREATOR_MAPPING = {
-    FileFormat.XLSX: ExcelFileCreator,
-    FileFormat.CSV: CsvFileCreator,
-    FileFormat.TXT: TxtFileCreator
-}
-PACKER_MAPPING = {
-    PackerFormat.ZIP: PackerZip,
-    PackerFormat.FORMAT_7Z: Packer7z,
-    PackerFormat.NO_PACKER: None
-}
-FILE_FORMAT_MAPPING = {
-    FileFormat.XLSX: '.xlsx',
-    FileFormat.CSV: '.csv',
-    FileFormat.TXT: '.txt',
-    None: ''
-}
-
-
-def main():
+
+def create_dirs():
     for dir_name in DIR_NAMES:
         if not os.path.exists(dir_name):
             os.mkdir(dir_name)
 
-    person_generator = PersonGenerator(locale=Locale.RU)
+
+def main(locale=None, processes=None):
+    create_dirs()
+
+    person_generator = None
     user_data = UserData()
 
     while True:
@@ -42,52 +40,79 @@ def main():
         if user_data.work_format == WorkFormat.GENERATOR:
             user_data.get_number_of_lines()
             user_data.get_data_file_format()
+            person_generator = create_generator(locale)
         elif user_data.work_format == WorkFormat.PACKER:
             user_data.get_files_for_packer()
 
         user_data.get_packer_format()
 
-        user_data.get_packer_type()
-        if user_data.packer_type == PackerType.PART_FILES:
+        if not user_data.rows_per_shard:
+            user_data.get_packer_type()
+        if user_data.packer_type in (
+                PackerType.PART_FILES, PackerType.VOLUMES
+        ):
             user_data.get_max_size()
 
-        if user_data.work_format == WorkFormat.GENERATOR:
-            data = person_generator.generate_random_to_generator(
-                user_data.number_of_lines
-            )
-        else:
-            data = user_data.files_for_packer
-
-        data_file = FILE_CREATOR_MAPPING.get(user_data.data_file_format)
-
-        if user_data.packer_format == PackerFormat.NO_PACKER:
-            data_file(data, OUTPUT_FILENAME).create()
-            return
-
-        archive = PACKER_MAPPING.get(user_data.packer_format)
-        inner_file_format = FILE_FORMAT_MAPPING.get(user_data.data_file_format)
-        if user_data.packer_type == PackerType.PART_FILES:
-            if user_data.work_format == WorkFormat.GENERATOR:
-                data = data_file(data).create()
-            archive(
-                data=data,
-                archive_filename=OUTPUT_FILENAME,
-                max_size_mb=user_data.max_size_mb,
-                inner_file_format=inner_file_format
-            ).create_one_archive_from_parts(delete_after=True)
-        else:
-            if user_data.work_format == WorkFormat.GENERATOR:
-                data_for_packer = data_file(data).create()
-            else:
-                data_for_packer = user_data.files_for_packer
-            print(data_for_packer)
-            archive(
-                data_for_packer,
-                OUTPUT_FILENAME,
-                inner_file_format=inner_file_format
-            ).create_archive()
+        run_job(
+            user_data,
+            person_generator,
+            workers=processes or GENERATOR_WORKERS
+        )
         return
 
 
+def batch_main(
+        jobs_path: str,
+        workers: int,
+        report_imports: bool = False,
+        locale=None
+):
+    create_dirs()
+
+    # CPU time of the process is the time of imports and start,
+    # no job has run yet.
+    startup = time.process_time()
+    failed = run_jobs(load_jobs(jobs_path), workers=workers, locale=locale)
+    if failed:
+        print(f'Не выполнены задания: {", ".join(failed)}')
+    if report_imports:
+        print(import_report(startup))
+
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--jobs', help='json-файл со списком заданий для пакетного запуска'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='количество одновременно выполняемых заданий'
+    )
+    parser.add_argument(
+        '--import-report', action='store_true',
+        help='вывести время запуска и загрузки форматов и архиваторов'
+    )
+    parser.add_argument(
+        '--serve', action='store_true',
+        help='запустить локальный HTTP-сервис генерации данных'
+    )
+    parser.add_argument(
+        '--processes', type=int,
+        help='количество процессов генерации строк в диалоговом режиме'
+    )
+    parser.add_argument(
+        '--locales',
+        help='локаль или смесь локалей по весам, например ru=60,en=25,de=15'
+    )
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    locale = parse_locales(args.locales or LOCALE_WEIGHTS)
+    if args.serve:
+        from utils.service import run_service
+
+        run_service(args.host, args.port, locale=locale)
+    elif args.jobs:
+        batch_main(args.jobs, args.workers, args.import_report, locale)
+    else:
+        main(locale, args.processes)
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from utils.columnar import ColumnarFile
+from utils.models import FileFormat, PackerFormat, WorkFormat
+from utils.runner import create_generator, run_job
+from utils.userdata import UserData
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Output directory of the runner in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('output')
+    return tmp_path
+
+
+@pytest.mark.parametrize('rows_per_shard', [None, 30])
+def test_runner_columnar_file_has_column_names(workdir, rows_per_shard):
+    person_generator = create_generator()
+    run_job(
+        UserData(
+            work_format=WorkFormat.GENERATOR,
+            number_of_lines=50,
+            data_file_format=FileFormat.COLUMNAR,
+            packer_format=PackerFormat.NO_PACKER,
+            rows_per_shard=rows_per_shard
+        ),
+        person_generator,
+        'people',
+        seed=5,
+        workers=1
+    )
+    filename = 'people-00001.col' if rows_per_shard else 'people.col'
+
+    with ColumnarFile(f'output/{filename}') as columnar_file:
+        assert list(columnar_file.columns) == list(person_generator.columns)
+        assert all(columnar_file.column('first_name'))
@@ -0,0 +1,95 @@
+import os
+import struct
+import zipfile
+
+import pytest
+
+from utils.packer import PackerZip
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Input and output directories of the packer in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('input/данные')
+    os.makedirs('output')
+    return tmp_path
+
+
+def write_input(files: dict[str, bytes]) -> None:
+    for name, data in files.items():
+        with open(f'input/{name}', 'wb') as f:
+            f.write(data)
+
+
+def update_archive() -> PackerZip:
+    packer = PackerZip(sorted(os.listdir('input')), 'files', incremental=True)
+    packer.create_archive()
+    return packer
+
+
+def read_archive() -> dict[str, bytes]:
+    with zipfile.ZipFile('output/files.zip') as zip_file:
+        assert zip_file.testzip() is None
+        return {name: zip_file.read(name) for name in zip_file.namelist()}
+
+
+def local_extra(name: str) -> bytes:
+    """Extra field of the local header of the member."""
+    with zipfile.ZipFile('output/files.zip') as zip_file:
+        zip_file.fp.seek(zip_file.getinfo(name).header_offset)
+        header = struct.unpack(
+            zipfile.structFileHeader, zip_file.fp.read(zipfile.sizeFileHeader)
+        )
+        zip_file.fp.seek(header[zipfile._FH_FILENAME_LENGTH], os.SEEK_CUR)
+        return zip_file.fp.read(header[zipfile._FH_EXTRA_FIELD_LENGTH])
+
+
+def test_update_copies_unchanged_and_compresses_changed(workdir):
+    files = {
+        'keep.txt': b'keep\n' * 1000,
+        'change.txt': b'old\n' * 1000,
+        'remove.txt': b'remove\n' * 1000,
+        'данные/файл.txt': 'строка\n'.encode() * 1000,
+    }
+    write_input(files)
+    first = update_archive()
+    assert first.update_stats == {'copied': 0, 'compressed': 4, 'removed': 0}
+
+    files['change.txt'] = b'new content\n' * 1000
+    files['new.txt'] = b'new\n' * 1000
+    del files['remove.txt']
+    write_input(files)
+    os.remove('input/remove.txt')
+    second = update_archive()
+
+    assert second.update_stats == {'copied': 2, 'compressed': 2, 'removed': 1}
+    assert read_archive() == files
+
+
+def test_copied_member_keeps_non_ascii_name(workdir):
+    write_input({'данные/файл.txt': 'строка\n'.encode() * 1000})
+    update_archive()
+    write_input({'new.txt': b'new\n'})
+    packer = update_archive()
+
+    assert packer.update_stats['copied'] == 1
+    with zipfile.ZipFile('output/files.zip') as zip_file:
+        zinfo = zip_file.getinfo('данные/файл.txt')
+        assert zinfo.flag_bits & 0x800
+        assert zip_file.read(zinfo) == 'строка\n'.encode() * 1000
+
+
+def test_copied_zip64_member(workdir, monkeypatch):
+    # Members larger than the limit are written with zip64 sizes.
+    monkeypatch.setattr(zipfile, 'ZIP64_LIMIT', 1024)
+    data = os.urandom(5000)
+    write_input({'big.bin': data})
+    update_archive()
+    write_input({'new.txt': b'new\n'})
+    packer = update_archive()
+
+    assert packer.update_stats['copied'] == 1
+    assert read_archive() == {'big.bin': data, 'new.txt': b'new\n'}
+    extra = local_extra('big.bin')
+    assert struct.unpack('<H', extra[:2])[0] == 1
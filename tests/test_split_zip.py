@@ -0,0 +1,130 @@
+import os
+import struct
+import time
+import zipfile
+
+import pytest
+
+from utils.packer import (
+    SINGLE_ZIP_SIGNATURE,
+    SPLIT_ZIP_SIGNATURE,
+    _SplitZipWriter,
+    _VolumeReader,
+    _open_split_zip,
+)
+
+
+def write_archive(
+        directory: str,
+        members: list[tuple[str, bytes, int]],
+        volume_size: int
+) -> list[str]:
+    """Write members (name, data, compress type) into a split archive."""
+    with _SplitZipWriter(directory, 'test', volume_size) as writer:
+        for name, data, compress_type in members:
+            zinfo = zipfile.ZipInfo(name, time.localtime()[:6])
+            zinfo.compress_type = compress_type
+            chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+            writer.write_member(zinfo, chunks, len(data))
+    return writer.volumes
+
+
+def read_archive(directory: str, volumes: list[str]) -> dict[str, bytes]:
+    """Read all members of the split archive back."""
+    paths = [f'{directory}/{volume}' for volume in volumes]
+    with _VolumeReader(paths) as reader:
+        with _open_split_zip(reader) as zip_file:
+            assert zip_file.testzip() is None
+            return {name: zip_file.read(name) for name in zip_file.namelist()}
+
+
+def volume_sizes(directory: str, volumes: list[str]) -> list[int]:
+    return [os.path.getsize(f'{directory}/{volume}') for volume in volumes]
+
+
+def test_single_volume_is_marked_not_split(tmp_path):
+    members = [('a.txt', b'hello ' * 100, zipfile.ZIP_DEFLATED)]
+
+    volumes = write_archive(str(tmp_path), members, 1024 * 1024)
+
+    assert volumes == ['test.zip']
+    with open(tmp_path / 'test.zip', 'rb') as f:
+        assert struct.unpack('<L', f.read(4))[0] == SINGLE_ZIP_SIGNATURE
+    with zipfile.ZipFile(tmp_path / 'test.zip') as zip_file:
+        assert zip_file.read('a.txt') == b'hello ' * 100
+    assert read_archive(str(tmp_path), volumes) == {'a.txt': b'hello ' * 100}
+
+
+@pytest.mark.parametrize('size', range(900, 1024, 7))
+def test_records_straddling_volume_boundary(tmp_path, size):
+    # The second local header falls across the end of the first volume.
+    members = [
+        ('first.bin', os.urandom(size), zipfile.ZIP_STORED),
+        ('second.bin', os.urandom(300), zipfile.ZIP_STORED),
+        ('third.bin', b'', zipfile.ZIP_STORED),
+    ]
+
+    volumes = write_archive(str(tmp_path), members, 1024)
+
+    assert len(volumes) > 1
+    with open(tmp_path / volumes[0], 'rb') as f:
+        assert struct.unpack('<L', f.read(4))[0] == SPLIT_ZIP_SIGNATURE
+    assert max(volume_sizes(str(tmp_path), volumes)) <= 1024
+    assert read_archive(str(tmp_path), volumes) == {
+        name: data for name, data, _ in members
+    }
+
+
+def test_member_spanning_several_volumes(tmp_path):
+    data = os.urandom(50_000)
+    members = [
+        ('small.txt', b'x' * 10, zipfile.ZIP_DEFLATED),
+        ('big.bin', data, zipfile.ZIP_STORED),
+        ('tail.txt', b'y' * 10, zipfile.ZIP_DEFLATED),
+    ]
+
+    volumes = write_archive(str(tmp_path), members, 4096)
+
+    assert len(volumes) > 10
+    assert volumes[-1] == 'test.zip'
+    assert volumes[0] == 'test.z01'
+    assert read_archive(str(tmp_path), volumes)['big.bin'] == data
+
+
+def test_lzma_members(tmp_path):
+    rows = b''.join(b'%d,row\n' % i for i in range(5000))
+    members = [
+        ('rows.csv', rows, zipfile.ZIP_LZMA),
+        ('random.bin', os.urandom(20_000), zipfile.ZIP_LZMA),
+        ('more.csv', rows * 2, zipfile.ZIP_LZMA),
+    ]
+
+    volumes = write_archive(str(tmp_path), members, 8192)
+
+    assert len(volumes) > 2
+    assert read_archive(str(tmp_path), volumes) == {
+        name: data for name, data, _ in members
+    }
+
+
+def test_zip64_end_record(tmp_path, monkeypatch):
+    # More entries than the limit make the writer add the zip64 end
+    # record and its locator, which counts all volumes.
+    monkeypatch.setattr(zipfile, 'ZIP_FILECOUNT_LIMIT', 20)
+    members = [
+        (f'{i:03d}.txt', b'row %d\n' % i * 50, zipfile.ZIP_DEFLATED)
+        for i in range(60)
+    ]
+
+    volumes = write_archive(str(tmp_path), members, 1024)
+
+    assert len(volumes) > 1
+    with open(tmp_path / volumes[-1], 'rb') as f:
+        assert zipfile.stringEndArchive64Locator in f.read()
+    paths = [f'{tmp_path}/{volume}' for volume in volumes]
+    with _VolumeReader(paths) as reader:
+        with pytest.raises(zipfile.BadZipFile):
+            zipfile.ZipFile(reader)
+    assert read_archive(str(tmp_path), volumes) == {
+        name: data for name, data, _ in members
+    }
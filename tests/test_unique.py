@@ -0,0 +1,30 @@
+import pytest
+
+from utils.runner import _generate, create_generator
+from utils.userdata import UserData
+
+
+def generate(workers: int, rows: int = 3000) -> list[tuple]:
+    """Seeded rows with unique names, duplicates resampled."""
+    return list(_generate(
+        UserData(number_of_lines=rows),
+        create_generator(),
+        ['first_name', 'last_name'],
+        'resample',
+        seed=11,
+        workers=workers
+    ))
+
+
+@pytest.fixture(scope='module')
+def parallel_rows() -> list[tuple]:
+    return generate(workers=2)
+
+
+def test_resampled_rows_repeat_across_runs(parallel_rows):
+    assert generate(workers=2) == parallel_rows
+
+
+def test_resampled_rows_do_not_depend_on_workers(parallel_rows):
+    assert generate(workers=1) == parallel_rows
+    assert len({row[0] for row in parallel_rows}) == len(parallel_rows)
@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+import py7zr
+import pytest
+
+import utils.packer_7z
+from utils.packer import ArchiveVerificationError, IPacker
+from utils.packer_7z import Packer7z, _member_digests_7z
+
+FILES = {
+    'rows.csv': b''.join(b'%d,row\n' % i for i in range(20_000)),
+    'random.bin': os.urandom(50_000),
+    'empty.txt': b'',
+}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Input files and the output directory in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('input')
+    os.makedirs('output')
+    for name, data in FILES.items():
+        with open(f'input/{name}', 'wb') as f:
+            f.write(data)
+    return tmp_path
+
+
+def test_7z_member_digests(workdir):
+    Packer7z(sorted(FILES), 'files').create_archive()
+
+    with py7zr.SevenZipFile('output/files.7z') as archive:
+        digests = _member_digests_7z(archive)
+
+    assert digests == {
+        name: {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+        for name, data in FILES.items()
+    }
+
+
+def test_7z_verification_detects_damage(workdir):
+    packer = Packer7z(sorted(FILES), 'files')
+    packer.create_archive()
+    assert packer.verify_archive()['sources'] == len(FILES)
+
+    with open('output/files.7z', 'r+b') as f:
+        f.seek(100)
+        byte = f.read(1)
+        f.seek(100)
+        f.write(bytes([byte[0] ^ 0xff]))
+
+    with pytest.raises(ArchiveVerificationError):
+        packer.verify_archive()
+
+
+def test_7z_without_worker_internals_fails(workdir, monkeypatch):
+    Packer7z(sorted(FILES), 'files').create_archive()
+    monkeypatch.setattr(utils.packer_7z, 'MemIO', None)
+
+    with py7zr.SevenZipFile('output/files.7z') as archive:
+        with pytest.raises(RuntimeError):
+            _member_digests_7z(archive)
+
+
+def test_packer_without_verification_is_rejected():
+    class Packer(IPacker):
+        EXTENSION = '.bin'
+
+        def create_archive(self, delete_after=False) -> None:
+            pass
+
+    Packer([], 'files')
+    with pytest.raises(ValueError):
+        Packer([], 'files', verify=True)
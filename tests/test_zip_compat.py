@@ -0,0 +1,27 @@
+import struct
+import zipfile
+
+import pytest
+
+from utils import zip_compat
+
+
+def test_zipfile_has_required_internals():
+    assert zip_compat.missing_internals() == []
+
+
+def test_missing_internals_fail_loudly(monkeypatch):
+    monkeypatch.delattr(zipfile, '_get_compressor')
+
+    assert zip_compat.missing_internals() == ['zipfile._get_compressor']
+    with pytest.raises(ImportError):
+        zip_compat.check_internals()
+
+
+def test_strip_extra():
+    zip64 = struct.pack('<HHQ', 1, 8, 2 ** 33)
+    timestamp = struct.pack('<HHBL', 0x5455, 5, 1, 1_700_000_000)
+
+    assert zip_compat.strip_extra(zip64 + timestamp, (1,)) == timestamp
+    assert zip_compat.strip_extra(timestamp + zip64, (1,)) == timestamp
+    assert zip_compat.strip_extra(timestamp, (1,)) == timestamp
@@ -0,0 +1,261 @@
+"""
+Columnar binary format.
+
+Layout of the file:
+- magic bytes MAGIC (8 bytes);
+- length of the header, uint32 little-endian, and 4 reserved bytes;
+- header in json, padded with spaces to a multiple of 8 bytes;
+- data section: one contiguous little-endian array per column,
+  each array aligned to 8 bytes.
+
+Header: {"rows": int, "columns": [{"name": str, "type": str,
+"data": [offset, size], "offsets": [offset, size]}]}.
+Offsets are relative to the start of the data section.
+Types: "int64", "float64", "date" (int32 days since 1970-01-01)
+and "str" (uint64 offsets array of rows + 1 items and utf-8 bytes).
+A column with empty values has "nulls": [offset, size], uint8 array
+of rows items, 1 for an empty value; empty values are stored as zero
+or an empty string.
+A column takes the type of its first value and is widened when
+a value of another type arrives: int64 to float64, any other mix
+to str.
+"""
+import array
+import datetime
+import json
+import mmap
+import struct
+import sys
+
+MAGIC = b'DGCOLV1\n'
+ALIGNMENT = 8
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+TYPECODES = {
+    'int64': 'q',
+    'float64': 'd',
+    'date': 'i',
+    'str': 'B',
+}
+
+
+def column_type(value) -> str:
+    """
+    Get type of the column by its first non-empty value.
+    :param value: Value of the column.
+    :return: Name of the type.
+    """
+    if isinstance(value, bool):
+        return 'str'
+    if isinstance(value, int):
+        return 'int64' if -2 ** 63 <= value < 2 ** 63 else 'str'
+    if isinstance(value, float):
+        return 'float64'
+    if isinstance(value, datetime.date):
+        return 'date'
+    return 'str'
+
+
+class ColumnBuilder:
+    """Accumulates values of one column in a compact array."""
+
+    def __init__(self, name: str, type_: str):
+        self.name = name
+        self.type = type_
+        self.data = (
+            bytearray() if type_ == 'str' else array.array(TYPECODES[type_])
+        )
+        self.offsets = array.array('Q', [0]) if type_ == 'str' else None
+        self.nulls = None
+        self.rows = 0
+
+    def _extend_nulls(self, values: list) -> list:
+        """Helper method. Mark empty values and replace them with zeros."""
+        if self.nulls is None:
+            self.nulls = bytearray(self.rows)
+        self.nulls.extend(value is None for value in values)
+        empty = '' if self.type == 'str' else 0
+        if self.type == 'date':
+            return [
+                value or datetime.date.fromordinal(EPOCH_ORDINAL)
+                for value in values
+            ]
+        return [empty if value is None else value for value in values]
+
+    def _widest_type(self, values: list) -> str:
+        """Helper method. Type holding the stored and the new values."""
+        types = {column_type(value) for value in values if value is not None}
+        types.add(self.type)
+        if len(types) == 1:
+            return self.type
+        if types == {'int64', 'float64'}:
+            return 'float64'
+        return 'str'
+
+    def _stored_values(self) -> list:
+        """Helper method. Values of the column added so far."""
+        if self.type == 'str':
+            return [
+                self.data[start:end].decode('utf-8')
+                for start, end in zip(self.offsets, self.offsets[1:])
+            ]
+        if self.type == 'date':
+            return [
+                datetime.date.fromordinal(value + EPOCH_ORDINAL)
+                for value in self.data
+            ]
+        return self.data.tolist()
+
+    def _promote(self, type_: str) -> None:
+        """Helper method. Convert the stored values to the wider type."""
+        values = self._stored_values()
+        if self.nulls is not None and type_ == 'str':
+            values = [
+                '' if null else value for value, null in zip(values, self.nulls)
+            ]
+        self.type = type_
+        self.data = (
+            bytearray() if type_ == 'str' else array.array(TYPECODES[type_])
+        )
+        self.offsets = array.array('Q', [0]) if type_ == 'str' else None
+        self._append(values)
+
+    def extend(self, values: list) -> None:
+        """
+        Add values to the column. None is stored as an empty value.
+        The column is widened if the values do not fit its type.
+        """
+        type_ = self._widest_type(values)
+        if type_ != self.type:
+            self._promote(type_)
+        if None in values or self.nulls is not None:
+            values = self._extend_nulls(values)
+        self.rows += len(values)
+        self._append(values)
+
+    def _append(self, values: list) -> None:
+        """Helper method. Add values without empty ones to the arrays."""
+        if self.type == 'str':
+            for value in values:
+                self.data += str(value).encode('utf-8')
+                self.offsets.append(len(self.data))
+        elif self.type == 'date':
+            self.data.extend(
+                value.toordinal() - EPOCH_ORDINAL for value in values
+            )
+        else:
+            self.data.extend(values)
+
+    def buffers(self) -> list[memoryview]:
+        """Little-endian buffers of the column: offsets first for strings."""
+        buffers = (
+            [self.data] if self.offsets is None else [self.offsets, self.data]
+        )
+        if sys.byteorder == 'big':
+            for buffer in buffers:
+                if isinstance(buffer, array.array):
+                    buffer.byteswap()
+        if self.nulls is not None:
+            buffers.append(self.nulls)
+        return [memoryview(buffer).cast('B') for buffer in buffers]
+
+
+def _padding(size: int) -> bytes:
+    """Helper function. Zero bytes up to the next aligned offset."""
+    return b'\0' * (-size % ALIGNMENT)
+
+
+def serialize(columns: list[ColumnBuilder], rows: int):
+    """
+    Serialize columns into chunks of the file.
+    :param columns: Filled column builders.
+    :param rows: Number of rows.
+    :return: Iterator of bytes-like chunks.
+    """
+    header_columns, chunks, offset = [], [], 0
+    for column in columns:
+        header_column = {'name': column.name, 'type': column.type}
+        buffers = column.buffers()
+        keys = ['data'] if column.offsets is None else ['offsets', 'data']
+        if column.nulls is not None:
+            keys.append('nulls')
+        for key, buffer in zip(keys, buffers):
+            header_column[key] = [offset, buffer.nbytes]
+            chunks.extend([buffer, _padding(buffer.nbytes)])
+            offset += buffer.nbytes + len(_padding(buffer.nbytes))
+        header_columns.append(header_column)
+
+    header = json.dumps(
+        {'rows': rows, 'columns': header_columns}, ensure_ascii=False
+    ).encode('utf-8')
+    header += b' ' * (-len(header) % ALIGNMENT)
+    yield MAGIC + struct.pack('<II', len(header), 0) + header
+    yield from chunks
+
+
+class ColumnarFile:
+    """Memory-mapped reader of the columnar format."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} - неверный формат файла')
+        header_size = struct.unpack_from('<I', self.mmap, len(MAGIC))[0]
+        header_start = len(MAGIC) + 8
+        header = json.loads(
+            self.mmap[header_start:header_start + header_size]
+        )
+        self.data_start = header_start + header_size
+        self.rows = header['rows']
+        self.columns = {column['name']: column for column in header['columns']}
+
+    def _buffer(self, offset: int, size: int) -> memoryview:
+        """Helper method. View of a part of the data section."""
+        start = self.data_start + offset
+        return memoryview(self.mmap)[start:start + size]
+
+    def raw(self, name: str) -> memoryview:
+        """
+        Typed view of a numeric or date column without copying.
+        :param name: Name of the column.
+        :return: Memoryview of int64, float64 or int32 items.
+        """
+        column = self.columns[name]
+        return self._buffer(*column['data']).cast(TYPECODES[column['type']])
+
+    def column(self, name: str) -> list:
+        """
+        Values of one column.
+        :param name: Name of the column.
+        :return: List of values.
+        """
+        column = self.columns[name]
+        if column['type'] == 'str':
+            offsets = self._buffer(*column['offsets']).cast('Q')
+            data = self._buffer(*column['data'])
+            values = [
+                str(data[offsets[i]:offsets[i + 1]], 'utf-8')
+                for i in range(self.rows)
+            ]
+        elif column['type'] == 'date':
+            values = [
+                datetime.date.fromordinal(value + EPOCH_ORDINAL)
+                for value in self.raw(name)
+            ]
+        else:
+            values = self.raw(name).tolist()
+        if 'nulls' in column:
+            nulls = self._buffer(*column['nulls'])
+            values = [
+                None if null else value for value, null in zip(values, nulls)
+            ]
+        return values
+
+    def close(self) -> None:
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,68 @@
+import json
+import zipfile
+import zlib
+
+from config import (
+    logger,
+    COMPRESSION_SAMPLE_SIZE,
+    INCOMPRESSIBLE_RATIO,
+    FAST_COMPRESSION_LEVEL
+)
+
+POLICIES = ('fastest', 'smallest')
+
+
+def check_policy(policy: str | None) -> None:
+    """Raise ValueError for an unknown compression policy."""
+    if policy is not None and policy not in POLICIES:
+        logger.error(f'check_policy - Неизвестная политика сжатия: {policy}')
+        raise ValueError(f'Неизвестная политика сжатия: {policy}')
+
+
+def sample_ratio(path: str, sample_size: int = COMPRESSION_SAMPLE_SIZE) -> float:
+    """
+    Estimate compressibility of the file by fast compression
+    of its beginning.
+    :param path: Path to the file.
+    :param sample_size: Number of bytes of the sample.
+    :return: Compressed size of the sample to its size, 1.0 for empty files.
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+    if not sample:
+        return 1.0
+    return len(zlib.compress(sample, 1)) / len(sample)
+
+
+def zip_method(ratio: float, policy: str) -> tuple[int, int | None, str]:
+    """
+    Choose the zip compression of a member.
+    :param ratio: Sample ratio of the member.
+    :param policy: 'fastest' or 'smallest'.
+    :return: Compression type, compression level and name of the method.
+    """
+    if ratio >= INCOMPRESSIBLE_RATIO:
+        return zipfile.ZIP_STORED, None, 'stored'
+    if policy == 'fastest':
+        return (
+            zipfile.ZIP_DEFLATED,
+            FAST_COMPRESSION_LEVEL,
+            f'deflate-{FAST_COMPRESSION_LEVEL}'
+        )
+    return zipfile.ZIP_LZMA, None, 'lzma'
+
+
+def write_report(path: str, policy: str, report: list[dict]) -> None:
+    """
+    Save the choice of compression of every member.
+    :param path: Path to the report file.
+    :param policy: Compression policy.
+    :param report: Entries with file, size, sample_ratio and method.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'policy': policy, 'files': report},
+            f,
+            ensure_ascii=False,
+            indent=2
+        )
@@ -1,15 +1,38 @@
 import abc
+import contextlib
 import csv
 import io
-import xlsxwriter
+import itertools
 
-from typing import Generator
+from typing import Generator, Iterator
 
-from config import TXT_ENCODING, CSV_ENCODING, OUTPUT_DIR
+from config import TXT_ENCODING, CSV_ENCODING, OUTPUT_DIR, STREAM_CHUNK_ROWS
+from utils.columnar import ColumnBuilder, column_type, serialize
+
+
+@contextlib.contextmanager
+def _text_writer(
+        output: io.BytesIO,
+        encoding: str,
+        newline: str = None
+) -> Iterator[io.TextIOWrapper]:
+    """
+    Helper function. Text stream encoding into the binary buffer,
+    so the text is not kept in memory a second time.
+    """
+    text = io.TextIOWrapper(output, encoding=encoding, newline=newline)
+    try:
+        yield text
+    finally:
+        text.flush()
+        text.detach()
 
 
 class IFileCreator(abc.ABC):
     """Interface for creating files."""
+    EXTENSION = ''
+    # Files of parts of data joined together form the file of all data.
+    CONCATENABLE = False
 
     def __init__(
             self,
@@ -29,29 +52,33 @@ class IFileCreator(abc.ABC):
         :return: BytesIO or created filename.
         """
 
+    def _iter_row_chunks(self) -> Iterator[list]:
+        """Helper method. Split data into chunks of rows."""
+        rows = iter(self.data)
+        while chunk := list(itertools.islice(rows, STREAM_CHUNK_ROWS)):
+            yield chunk
 
-class ExcelFileCreator(IFileCreator):
-    def create(self):
-        output = (
-            f'{self.output_dir}/{self.filename}.xlsx'
-            if self.filename
-            else io.BytesIO()
-        )
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet()
-
-        row = 0
-        for record in self.data:
-            worksheet.write_row(row, 0, record)
-            row += 1
-        workbook.close()
-
-        output.seek(0) if not self.filename else None
-
-        return f'{self.filename}.xlsx' if self.filename else output
+    def create_to_stream(self) -> Iterator[bytes]:
+        """
+        Serialize data into chunks of bytes without building
+        the whole file in memory.
+        Formats that cannot be serialized in parts are created
+        in a buffer, even if the filename is set, and returned
+        as one chunk.
+        :return: Iterator of bytes.
+        """
+        filename, self.filename = self.filename, None
+        try:
+            output = self.create()
+        finally:
+            self.filename = filename
+        yield output.getvalue()
 
 
 class CsvFileCreator(IFileCreator):
+    EXTENSION = '.csv'
+    CONCATENABLE = True
+
     def _create_to_file(self):
         """Helper method. Create csv file with random data to file."""
         with open(
@@ -67,12 +94,13 @@ class CsvFileCreator(IFileCreator):
 
     def _create_to_buffer(self):
         """Helper method. Create csv file with random data to buffer."""
-        output = io.StringIO()
-        writer = csv.writer(output)
-        for row in self.data:
-            writer.writerow(row)
+        output = io.BytesIO()
+        with _text_writer(output, CSV_ENCODING, newline='') as text:
+            writer = csv.writer(text)
+            for row in self.data:
+                writer.writerow(row)
         output.seek(0)
-        return io.BytesIO(output.getvalue().encode('utf-8'))
+        return output
 
     def create(self):
         return (
@@ -81,8 +109,20 @@ class CsvFileCreator(IFileCreator):
             else self._create_to_buffer()
         )
 
+    def create_to_stream(self):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        for chunk in self._iter_row_chunks():
+            writer.writerows(chunk)
+            yield output.getvalue().encode(CSV_ENCODING)
+            output.seek(0)
+            output.truncate()
+
 
 class TxtFileCreator(IFileCreator):
+    EXTENSION = '.txt'
+    CONCATENABLE = True
+
     def _create_to_file(self):
         """Helper method. Create txt file with random data to file."""
         with open(
@@ -96,11 +136,12 @@ class TxtFileCreator(IFileCreator):
 
     def _create_to_buffer(self):
         """Helper method. Create txt file with random data to buffer."""
-        output = io.StringIO()
-        for row in self.data:
-            output.write(', '.join(map(str, row)) + '\n')
+        output = io.BytesIO()
+        with _text_writer(output, TXT_ENCODING) as text:
+            for row in self.data:
+                text.write(', '.join(map(str, row)) + '\n')
         output.seek(0)
-        return io.BytesIO(output.getvalue().encode('utf-8'))
+        return output
 
     def create(self):
         return (
@@ -108,3 +149,68 @@ class TxtFileCreator(IFileCreator):
             if self.filename
             else self._create_to_buffer()
         )
+
+    def create_to_stream(self):
+        for chunk in self._iter_row_chunks():
+            yield ''.join(
+                ', '.join(map(str, row)) + '\n' for row in chunk
+            ).encode(TXT_ENCODING)
+
+
+class ColumnarFileCreator(IFileCreator):
+    """
+    Columnar binary file: one contiguous typed array per column,
+    so consumers can memory-map it and read single columns.
+    The format is described in utils.columnar.
+    """
+    EXTENSION = '.col'
+
+    def __init__(
+            self,
+            data: list | Generator,
+            filename: str = None,
+            output_dir = OUTPUT_DIR,
+            header: list | tuple = None
+    ):
+        """
+        :param header: Names of the columns. column_0, column_1, ...
+        if not specified.
+        """
+        super().__init__(data, filename, output_dir)
+        self.header = header
+
+    def _build_columns(self) -> tuple[list[ColumnBuilder], int]:
+        """Helper method. Collect data into column arrays."""
+        columns, rows = [], 0
+        for chunk in self._iter_row_chunks():
+            if not columns:
+                columns = [
+                    ColumnBuilder(
+                        self.header[i] if self.header else f'column_{i}',
+                        column_type(next(
+                            (value for value in values if value is not None),
+                            None
+                        ))
+                    )
+                    for i, values in enumerate(zip(*chunk))
+                ]
+            for column, values in zip(columns, zip(*chunk)):
+                column.extend(values)
+            rows += len(chunk)
+        return columns, rows
+
+    def create_to_stream(self):
+        yield from serialize(*self._build_columns())
+
+    def create(self):
+        if not self.filename:
+            output = io.BytesIO()
+            for chunk in self.create_to_stream():
+                output.write(chunk)
+            output.seek(0)
+            return output
+
+        with open(f'{self.output_dir}/{self.filename}.col', 'wb') as f:
+            for chunk in self.create_to_stream():
+                f.write(chunk)
+        return f'{self.filename}.col'
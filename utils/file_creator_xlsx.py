@@ -0,0 +1,62 @@
+import io
+import xlsxwriter
+
+from typing import Generator
+
+from config import OUTPUT_DIR
+from utils.file_creator import IFileCreator
+
+
+class ExcelFileCreator(IFileCreator):
+    EXTENSION = '.xlsx'
+    MAX_ROWS = 1_048_576
+
+    def __init__(
+            self,
+            data: list | Generator,
+            filename: str = None,
+            output_dir = OUTPUT_DIR,
+            header: list | tuple = None,
+            constant_memory: bool = True
+    ):
+        """
+        :param header: Header row written at the top of every worksheet.
+        :param constant_memory: Flush every row to disk as soon as
+        it is written instead of keeping all cells until closing.
+        """
+        super().__init__(data, filename, output_dir)
+        self.header = header
+        self.constant_memory = constant_memory
+
+    def _add_worksheet(self, workbook: xlsxwriter.Workbook) -> tuple:
+        """
+        Helper method. Add worksheet and write the header.
+        :return: Worksheet and number of the first free row.
+        """
+        worksheet = workbook.add_worksheet()
+        if self.header:
+            worksheet.write_row(0, 0, self.header)
+            return worksheet, 1
+        return worksheet, 0
+
+    def create(self):
+        output = (
+            f'{self.output_dir}/{self.filename}.xlsx'
+            if self.filename
+            else io.BytesIO()
+        )
+        workbook = xlsxwriter.Workbook(
+            output, {'constant_memory': self.constant_memory}
+        )
+        worksheet, row = self._add_worksheet(workbook)
+
+        for record in self.data:
+            if row == self.MAX_ROWS:
+                worksheet, row = self._add_worksheet(workbook)
+            worksheet.write_row(row, 0, record)
+            row += 1
+        workbook.close()
+
+        output.seek(0) if not self.filename else None
+
+        return f'{self.filename}.xlsx' if self.filename else output
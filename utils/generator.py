@@ -1,8 +1,82 @@
 import abc
+import bisect
+import collections
+import concurrent.futures
+import hashlib
+import itertools
+import os
+import random
 
-from mimesis import Person, Locale
+from mimesis import Generic, Locale
 from typing import Generator
 
+from config import (
+    logger,
+    GENERATOR_WORKERS,
+    GENERATOR_CHUNK_SIZE,
+    GENERATOR_ENGINE,
+    LOCALE_BATCH_ROWS
+)
+from utils.pools import PoolSampler, COLUMN_METHODS
+from utils.schema import Schema, DEFAULT_SCHEMA
+
+_worker_generator = None
+
+# Fractional part of the golden ratio. Multiples of it modulo 1 are
+# spread evenly over [0, 1) for any number of them.
+_GOLDEN_FRACTION = 0.6180339887498949
+
+
+def _derive_seed(master_seed: int, chunk_index: int) -> int:
+    """
+    Derive a seed for a chunk of rows from the master seed.
+    :param master_seed: Master seed of the job.
+    :param chunk_index: Index of the chunk.
+    :return: 64-bit seed.
+    """
+    digest = hashlib.blake2b(
+        f'{master_seed}:{chunk_index}'.encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def init_worker(
+        locale: Locale | dict[Locale, float],
+        engine: str,
+        schema: Schema
+) -> None:
+    """
+    Process pool initializer. Creates one generator per worker.
+    Pools of generate_range are started with it.
+    """
+    global _worker_generator
+    _worker_generator = create_person_generator(locale, engine, schema)
+
+
+def _generate_chunk(seed: int, number_of_lines: int) -> list:
+    """
+    Process pool task. Generates a chunk of rows with the given seed.
+    :param seed: Seed of the chunk.
+    :param number_of_lines: Number of lines in the chunk.
+    :return: List of random rows.
+    """
+    _worker_generator.reseed(seed)
+    return _worker_generator.generate_random_to_list(number_of_lines)
+
+
+def generate_range(seed: int, start: int, stop: int) -> list:
+    """
+    Process pool task. Generates rows of the index range
+    of the seekable data. The pool must be started with init_worker.
+    :param seed: Master seed.
+    :param start: Index of the first row.
+    :param stop: Index after the last row.
+    :return: List of random rows.
+    """
+    return list(
+        _worker_generator.generate_range_to_generator(seed, start, stop)
+    )
+
 
 class IGenerator(abc.ABC):
     """
@@ -34,54 +108,360 @@ class IGenerator(abc.ABC):
 
 
 class PersonGenerator(IGenerator):
+    """
+    Generator of random person data.
+    Engines: 'mimesis' calls mimesis provider methods for every value,
+    'pools' draws values in bulk from precomputed value pools
+    with the same distributions.
+    Columns of rows are described by the schema, the default schema
+    contains all columns of person data.
+    """
 
-    def __init__(self, locale: Locale = Locale.RU):
-        self.person = Person(locale=locale)
+    ENGINES = ('mimesis', 'pools')
+
+    def __init__(
+            self,
+            locale: Locale = Locale.RU,
+            engine: str = GENERATOR_ENGINE,
+            schema: Schema = None
+    ):
+        """
+        :param schema: Columns of generated rows.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f'Неизвестный движок генерации: {engine}')
+        self.locale = locale
+        self.engine = engine
+        self.schema = schema or DEFAULT_SCHEMA
+        self.columns = self.schema.names
+        self._pool_columns = [column.method for column in self.schema.columns]
+        if engine == 'mimesis':
+            self.generic = Generic(locale=locale)
+            self.person = self.generic.person
+            self._sampler = None
+            self._row, self._values = self.schema.compile(self.generic)
+            self._providers = [
+                getattr(self.generic, provider)
+                for provider in {column.provider for column in self.schema.columns}
+            ]
+        else:
+            self._check_pools_schema()
+            self.generic = None
+            self.person = None
+            self._sampler = PoolSampler(locale)
+
+    def _check_pools_schema(self) -> None:
+        """Helper method. Check that the pools have all columns."""
+        for column in self.schema.columns:
+            if (column.provider != 'person'
+                    or column.method not in COLUMN_METHODS
+                    or column.args
+                    or column.null_rate):
+                logger.error(
+                    f'{self.__class__.__qualname__} - '
+                    f'Колонка {column.name} недоступна движку pools'
+                )
+                raise ValueError(
+                    f'Колонка {column.name} недоступна движку pools'
+                )
+
+    @property
+    def sampler(self) -> PoolSampler:
+        """Pool sampler, sharing the random generator of the provider."""
+        if self._sampler is None:
+            self._check_pools_schema()
+            self._sampler = PoolSampler(self.locale, person=self.person)
+        return self._sampler
+
+    def reseed(self, seed: int = None) -> None:
+        """Reseed the random generator of the engine."""
+        if self.generic:
+            self.generic.random.seed(seed)
+            for provider in self._providers:
+                provider.reseed(seed)
+        else:
+            self._sampler.reseed(seed)
 
     def generate_random_row(self) -> tuple:
+        if self.engine == 'pools':
+            return self.sampler.block(1, self._pool_columns)[0]
+        return self._row()
+
+    def generate_row_at(self, seed: int, index: int) -> tuple:
+        """
+        Generates the row of the seekable data. Every row is generated
+        with its own seed derived from the master seed and the index
+        of the row, so the row is a function of them only: any row
+        or range of rows is generated without the rows before it,
+        in any process, in any order.
+        :param seed: Master seed.
+        :param index: Index of the row.
+        :return: One line of random data as a tuple.
+        """
+        self.reseed(_derive_seed(seed, index))
+        return self.generate_random_row()
+
+    def generate_range_to_generator(
+            self,
+            seed: int,
+            start: int,
+            stop: int
+    ) -> Generator:
+        """
+        Generates rows of the index range of the seekable data,
+        see generate_row_at.
+        :param seed: Master seed.
+        :param start: Index of the first row.
+        :param stop: Index after the last row.
+        :return: Object generator from tuples of random data.
+        """
         return (
-            self.person.first_name(),
-            self.person.last_name(),
-            self.person.gender(),
-            self.person.weight(),
-            self.person.username(),
-            self.person.email(),
-            self.person.password(),
-            self.person.birthdate(),
-            self.person.height(),
-            self.person.nationality()
+            self.generate_row_at(seed, index) for index in range(start, stop)
         )
 
+    def generate_value(self, index: int):
+        """
+        Generates one value of the column.
+        :param index: Index of the column in the schema.
+        :return: Random value.
+        """
+        if self.engine == 'pools':
+            method = COLUMN_METHODS[self.schema.columns[index].method]
+            return getattr(self.sampler, method)(1)[0]
+        return self._values[index]()
+
     def generate_random_to_generator(self, number_of_lines: int) -> Generator:
-        return (
-            (
-                self.person.first_name(),
-                self.person.last_name(),
-                self.person.gender(),
-                self.person.weight(),
-                self.person.username(),
-                self.person.email(),
-                self.person.password(),
-                self.person.birthdate(),
-                self.person.height(),
-                self.person.nationality()
-            )
-            for _ in range(number_of_lines)
-        )
+        if self.engine == 'pools':
+            return self.generate_block_to_generator(number_of_lines)
+        row = self._row
+        return (row() for _ in range(number_of_lines))
 
     def generate_random_to_list(self, number_of_lines: int) -> list:
-        return [
+        if self.engine == 'pools':
+            return self.generate_block(number_of_lines)
+        row = self._row
+        return [row() for _ in range(number_of_lines)]
+
+    def generate_block(self, number_of_lines: int) -> list:
+        """
+        Generates random data column by column.
+        Values are drawn in bulk from precomputed pools of the locale
+        with the engine's random generator, then rows are zipped out
+        of the columns. Distributions match the per-row methods.
+        :param number_of_lines: Number of lines.
+        :return: List of random rows.
+        """
+        return self.sampler.block(number_of_lines, self._pool_columns)
+
+    def generate_block_to_generator(
+            self,
+            number_of_lines: int,
+            block_size: int = GENERATOR_CHUNK_SIZE
+    ) -> Generator:
+        """
+        Generates random data in blocks of the specified size.
+        :param number_of_lines: Number of lines.
+        :param block_size: Number of lines in one block.
+        :return: Object generator from tuples of random data.
+        """
+        for start in range(0, number_of_lines, block_size):
+            yield from self.generate_block(
+                min(block_size, number_of_lines - start)
+            )
+
+    def generate_parallel_to_generator(
+            self,
+            number_of_lines: int,
+            seed: int = None,
+            workers: int = GENERATOR_WORKERS,
+            chunk_size: int = GENERATOR_CHUNK_SIZE,
+            start_row: int = None
+    ) -> Generator:
+        """
+        Generates random data in a process pool.
+        Rows are split into contiguous chunks, each chunk is generated
+        by a worker with a seed derived from the master seed.
+        Chunks are returned in order, so the output is identical
+        for the same seed.
+        :param number_of_lines: Number of lines.
+        :param seed: Master seed. Random if not specified.
+        :param workers: Number of worker processes. CPU count if None.
+        :param chunk_size: Number of lines in one chunk.
+        :param start_row: Generate rows from this index of the seekable
+        data (see generate_row_at) instead of chunks with own seeds.
+        The output does not depend on chunk_size then.
+        :return: Object generator from tuples of random data.
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        workers = workers or os.cpu_count() or 1
+        chunks = [
             (
-                self.person.first_name(),
-                self.person.last_name(),
-                self.person.gender(),
-                self.person.weight(),
-                self.person.username(),
-                self.person.email(),
-                self.person.password(),
-                self.person.birthdate(),
-                self.person.height(),
-                self.person.nationality()
+                _generate_chunk,
+                _derive_seed(seed, index),
+                min(chunk_size, number_of_lines - start)
+            )
+            if start_row is None
+            else (
+                generate_range,
+                seed,
+                start_row + start,
+                start_row + min(start + chunk_size, number_of_lines)
+            )
+            for index, start in enumerate(
+                range(0, number_of_lines, chunk_size)
+            )
+        ]
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(self.locale, self.engine, self.schema)
+        ) as executor:
+            pending = collections.deque()
+            for task, *args in chunks:
+                pending.append(executor.submit(task, *args))
+                if len(pending) > workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+
+class MixedLocaleGenerator(PersonGenerator):
+    """
+    Generator of person data of several locales mixed by weights,
+    e.g. {Locale.RU: 60, Locale.EN: 25, Locale.DE: 15}.
+    One generator with its providers is created for every locale once.
+    Rows are generated in batches of batch_rows rows of one locale
+    by the generator of the locale, so the mix is as fast as a single
+    locale. Batches are assigned to locales by a low-discrepancy
+    sequence: shares of the locales are close to the weights after
+    a few batches, and the locale of a batch depends only on its index
+    and the seed, so the seekable data keeps its locales in any range.
+    """
+
+    def __init__(
+            self,
+            locale: dict[Locale, float],
+            engine: str = GENERATOR_ENGINE,
+            schema: Schema = None,
+            batch_rows: int = LOCALE_BATCH_ROWS
+    ):
+        """
+        :param locale: Weights of the locales. The first locale
+        is the primary one: the state inherited from PersonGenerator
+        is the state of its generator.
+        :param batch_rows: Number of rows of one locale in a batch.
+        """
+        if (not locale
+                or not all(isinstance(key, Locale) for key in locale)
+                or not all(weight > 0 for weight in locale.values())):
+            logger.error(
+                f'{self.__class__.__qualname__} - '
+                f'Неверные веса локалей: {locale}'
+            )
+            raise ValueError(
+                'Веса локалей должны быть положительными числами'
             )
-            for _ in range(number_of_lines)
+        super().__init__(next(iter(locale)), engine, schema)
+        self.locale = dict(locale)
+        self.batch_rows = batch_rows
+        self.generators = [
+            PersonGenerator(locale=key, engine=engine, schema=self.schema)
+            for key in self.locale
         ]
+        total = sum(self.locale.values())
+        self._bounds = list(itertools.accumulate(
+            weight / total for weight in self.locale.values()
+        ))
+        self._random = random.Random()
+        self._phase = self._random.random()
+        # Number of rows generated since the last reseed.
+        self._position = 0
+        self._seed_phase = None, None
+
+    @staticmethod
+    def _phase_of(seed: int) -> float:
+        """Helper method. Start of the sequence of batches of the seed."""
+        return _derive_seed(seed, -1) / 2 ** 64
+
+    def _generator_of(self, phase: float, batch: int) -> PersonGenerator:
+        """Helper method. Generator of the locale of the batch."""
+        index = bisect.bisect_right(
+            self._bounds, (phase + batch * _GOLDEN_FRACTION) % 1.0
+        )
+        return self.generators[min(index, len(self.generators) - 1)]
+
+    def _batches(self, number_of_lines: int) -> Generator:
+        """
+        Helper method. Split the next rows into runs of one locale.
+        :return: Object generator of generators and numbers of rows.
+        """
+        while number_of_lines > 0:
+            batch, offset = divmod(self._position, self.batch_rows)
+            lines = min(self.batch_rows - offset, number_of_lines)
+            self._position += lines
+            number_of_lines -= lines
+            yield self._generator_of(self._phase, batch), lines
+
+    def reseed(self, seed: int = None) -> None:
+        self._random.seed(seed)
+        self._phase = (
+            self._random.random() if seed is None else self._phase_of(seed)
+        )
+        self._position = 0
+        for index, generator in enumerate(self.generators):
+            generator.reseed(
+                None if seed is None else _derive_seed(seed, -2 - index)
+            )
+
+    def generate_random_row(self) -> tuple:
+        for generator, _ in self._batches(1):
+            return generator.generate_random_row()
+
+    def generate_row_at(self, seed: int, index: int) -> tuple:
+        if self._seed_phase[0] != seed:
+            self._seed_phase = seed, self._phase_of(seed)
+        generator = self._generator_of(
+            self._seed_phase[1], index // self.batch_rows
+        )
+        return generator.generate_row_at(seed, index)
+
+    def generate_value(self, index: int):
+        generator = self._random.choices(
+            self.generators, cum_weights=self._bounds
+        )[0]
+        return generator.generate_value(index)
+
+    def generate_random_to_generator(self, number_of_lines: int) -> Generator:
+        for generator, lines in self._batches(number_of_lines):
+            yield from generator.generate_random_to_generator(lines)
+
+    def generate_random_to_list(self, number_of_lines: int) -> list:
+        rows = []
+        for generator, lines in self._batches(number_of_lines):
+            rows.extend(generator.generate_random_to_list(lines))
+        return rows
+
+    def generate_block(self, number_of_lines: int) -> list:
+        rows = []
+        for generator, lines in self._batches(number_of_lines):
+            rows.extend(generator.generate_block(lines))
+        return rows
+
+
+def create_person_generator(
+        locale: Locale | dict[Locale, float] = Locale.RU,
+        engine: str = GENERATOR_ENGINE,
+        schema: Schema = None
+) -> PersonGenerator:
+    """
+    Create the generator of the locale.
+    :param locale: Locale or weights of several locales,
+    e.g. {Locale.RU: 60, Locale.EN: 25, Locale.DE: 15}.
+    :param engine: Generator engine.
+    :param schema: Columns of generated rows.
+    :return: Generator.
+    """
+    if isinstance(locale, dict):
+        return MixedLocaleGenerator(locale, engine, schema)
+    return PersonGenerator(locale, engine, schema)
@@ -0,0 +1,175 @@
+import contextlib
+import itertools
+import json
+import sys
+import threading
+import time
+
+from typing import Iterable, Iterator
+
+from config import logger
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+TRACK_BATCH_SIZE = 1000
+
+
+def peak_memory_mb() -> float | None:
+    """Peak RSS of the current process in MB, None if not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageMetrics:
+    """Counters of one stage."""
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rows = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.peak_memory_mb = None
+
+    def to_dict(self) -> dict:
+        record = {
+            'wall_time': round(self.wall_time, 4),
+            'cpu_time': round(self.cpu_time, 4),
+            'rows': self.rows,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'peak_memory_mb': self.peak_memory_mb,
+        }
+        if self.bytes_in and self.bytes_out:
+            record['compression_ratio'] = round(
+                self.bytes_in / self.bytes_out, 3
+            )
+        return record
+
+
+class JobMetrics:
+    """
+    Metrics of one job split by stages.
+    Stages can be nested, e.g. the packer pulls data from the file
+    creator, which pulls rows from the generator: the time of a nested
+    stage is not counted in the outer one. CPU time of a stage is
+    the time of its thread, CPU time of the job is the process time.
+    """
+
+    def __init__(self, job: str, **details):
+        self.job = job
+        self.details = details
+        self.stages: dict[str, StageMetrics] = {}
+        self._local = threading.local()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    def _stack(self) -> list:
+        """Helper method. Stack of running stages of the current thread."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def get(self, stage: str) -> StageMetrics:
+        """Get counters of the stage."""
+        if stage not in self.stages:
+            self.stages[stage] = StageMetrics()
+        return self.stages[stage]
+
+    @contextlib.contextmanager
+    def stage(self, stage: str):
+        """
+        Measure time of the code block as the stage.
+        :param stage: Name of the stage.
+        """
+        stack = self._stack()
+        # [stage, wall and cpu time of the nested stages]
+        frame = [stage, 0.0, 0.0]
+        stack.append(frame)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield self.get(stage)
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            stack.pop()
+            metrics = self.get(stage)
+            metrics.wall_time += wall - frame[1]
+            metrics.cpu_time += cpu - frame[2]
+            metrics.peak_memory_mb = peak_memory_mb()
+            if stack:
+                stack[-1][1] += wall
+                stack[-1][2] += cpu
+
+    def track(
+            self,
+            iterable: Iterable,
+            stage: str,
+            count_bytes: bool = False
+    ) -> Iterator:
+        """
+        Measure time of producing items of the iterable as the stage.
+        Items are pulled in batches, so the overhead does not depend
+        on the number of items.
+        :param iterable: Rows or bytes chunks.
+        :param stage: Name of the stage.
+        :param count_bytes: Count items as bytes chunks instead of rows.
+        :return: Iterator of the same items.
+        """
+        iterator = iter(iterable)
+        metrics = self.get(stage)
+        while True:
+            with self.stage(stage):
+                batch = list(itertools.islice(iterator, TRACK_BATCH_SIZE))
+            if not batch:
+                return
+            if count_bytes:
+                metrics.bytes_out += sum(map(len, batch))
+            else:
+                metrics.rows += len(batch)
+            yield from batch
+
+    def to_dict(self) -> dict:
+        return {
+            'job': self.job,
+            **self.details,
+            'wall_time': round(time.perf_counter() - self._start_wall, 4),
+            'cpu_time': round(time.process_time() - self._start_cpu, 4),
+            'peak_memory_mb': peak_memory_mb(),
+            'stages': {
+                stage: metrics.to_dict()
+                for stage, metrics in self.stages.items()
+            },
+        }
+
+    def emit(self) -> dict:
+        """
+        Send the record of the job to the metrics log.
+        :return: Record of the job.
+        """
+        record = self.to_dict()
+        logger.bind(metrics=True).info(json.dumps(record, ensure_ascii=False))
+        return record
+
+
+class NullMetrics:
+    """Metrics that record nothing, used when metrics are disabled."""
+
+    @contextlib.contextmanager
+    def stage(self, stage: str):
+        yield StageMetrics()
+
+    def track(self, iterable: Iterable, stage: str, count_bytes=False):
+        return iterable
+
+    def get(self, stage: str) -> StageMetrics:
+        return StageMetrics()
+
+    def emit(self) -> None:
+        return None
@@ -10,6 +10,7 @@ class FileFormat(enum.Enum):
     XLSX = '1'
     CSV = '2'
     TXT = '3'
+    COLUMNAR = '4'
 
 
 class PackerFormat(enum.Enum):
@@ -29,7 +30,7 @@ class PackerFormat(enum.Enum):
         :param value: User input.
         """
         field_names = {
-            '1': 'zip',
+            '1': 'zip (поддерживает разбиение на части).',
             '2': '7z (поддерживает разбиение на части).',
             '3': 'Архивация не требуется'
         }
@@ -44,6 +45,7 @@ class PackerType(enum.Enum):
 
     ONE_FILE = '1'
     PART_FILES = '2'
+    VOLUMES = '3'
 
     @classmethod
     def field_name(cls, value) -> str:
@@ -53,7 +55,8 @@ class PackerType(enum.Enum):
         """
         field_names = {
             '1': 'Архивировать в один файл',
-            '2': 'Указать максимальный размер архива.'
+            '2': 'Указать максимальный размер архива.',
+            '3': 'Разбить архив на тома указанного размера.'
         }
         return field_names[value.value]
 
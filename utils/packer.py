@@ -1,37 +1,623 @@
 import abc
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
 import io
-import multivolumefile
+import json
+import mmap
 import os
-import py7zr
+import re
+import struct
+import tempfile
+import time
 import zipfile
+import zlib
 
-from config import logger, OUTPUT_DIR, INPUT_DIR, INNER_FILENAME
+from typing import Iterable, Iterator
+
+from config import (
+    logger,
+    OUTPUT_DIR,
+    INPUT_DIR,
+    INNER_FILENAME,
+    PACKER_WORKERS,
+    ZIP_COMPRESSION_LEVEL,
+    PACKER_READ_CHUNK_SIZE,
+    COMPRESSION_POLICY,
+    VERIFY_ARCHIVE,
+    VERIFY_WORKERS
+)
+from utils.compression import (
+    check_policy,
+    sample_ratio,
+    write_report,
+    zip_method
+)
+from utils.zip_compat import (
+    central_directory_disk,
+    encode_filename_flags,
+    get_compressor,
+    open_raw_member,
+    set_compresslevel,
+    strip_extra,
+    write_raw_member
+)
+
+# First bytes of the first volume of a split zip archive
+# and of a split archive that fits in one volume.
+SPLIT_ZIP_SIGNATURE = 0x08074b50
+SINGLE_ZIP_SIGNATURE = 0x30304b50
+DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+
+
+class ArchiveVerificationError(Exception):
+    """The written archive is damaged or differs from the sources."""
+
+
+class _LimitedReader(io.RawIOBase):
+    """Reader of the next size bytes of a file object."""
+
+    def __init__(self, fp: io.IOBase, size: int):
+        self.fp = fp
+        self.remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fp.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+class _VolumeReader(io.RawIOBase):
+    """Read-only seekable file joining the volumes in order."""
+
+    def __init__(self, paths: list[str]):
+        self._files = [open(path, 'rb') for path in paths]
+        # Offset of every volume in the joined file and the total size.
+        self.starts = [0]
+        for path in paths:
+            self.starts.append(self.starts[-1] + os.path.getsize(path))
+        self._position = 0
+        # Offset and bytes returned instead of the stored ones.
+        self._patch = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.starts[-1]
+        self._position = offset
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        size = 0
+        view = memoryview(buffer)
+        while size < len(view) and self._position < self.starts[-1]:
+            index = next(
+                i for i in range(len(self._files))
+                if self._position < self.starts[i + 1]
+            )
+            file = self._files[index]
+            file.seek(self._position - self.starts[index])
+            read = file.readinto(view[size:size + min(
+                len(view) - size, self.starts[index + 1] - self._position
+            )])
+            if not read:
+                break
+            size += read
+            self._position += read
+        if self._patch:
+            offset, data = self._patch
+            start = self._position - size
+            begin = max(start, offset)
+            end = min(self._position, offset + len(data))
+            if begin < end:
+                view[begin - start:end - start] = (
+                    data[begin - offset:end - offset]
+                )
+        return size
+
+    def single_disk(self) -> None:
+        """
+        Present the volumes to zipfile as one disk. zipfile rejects
+        the zip64 end locator of a split archive, because it counts
+        the volumes, so the locator is read as the one of a single disk.
+        The end records are expected without a comment, as
+        _SplitZipWriter writes them.
+        """
+        offset = (
+            self.starts[-1]
+            - zipfile.sizeEndCentDir
+            - zipfile.sizeEndCentDir64Locator
+        )
+        if offset < 0:
+            return
+        self.seek(offset)
+        signature, _, end_offset, _ = struct.unpack(
+            zipfile.structEndArchive64Locator,
+            self.read(zipfile.sizeEndCentDir64Locator)
+        )
+        self.seek(0)
+        if signature == zipfile.stringEndArchive64Locator:
+            self._patch = (offset, struct.pack(
+                zipfile.structEndArchive64Locator,
+                signature, 0, end_offset, 1
+            ))
+
+    def close(self) -> None:
+        for file in self._files:
+            file.close()
+        super().close()
+
+
+def _open_split_zip(reader: _VolumeReader) -> zipfile.ZipFile:
+    """
+    Helper function. Open the split zip archive joined from its volumes.
+    :param reader: Reader of the volumes, closed by the caller.
+    :return: ZipFile reading the members of all volumes.
+    """
+    reader.single_disk()
+    zip_file = zipfile.ZipFile(reader)
+    # Offsets of members are relative to their volumes.
+    cd_disk = central_directory_disk(reader)
+    for zinfo in zip_file.infolist():
+        zinfo.header_offset += (
+            reader.starts[zinfo.volume] - reader.starts[cd_disk]
+        )
+    return zip_file
+
+
+@contextlib.contextmanager
+def map_file(path: str) -> Iterator[memoryview]:
+    """
+    Map the file into memory read-only, so it is read by the OS
+    page by page instead of being copied into Python objects.
+    Slices of the view must be released before the exit.
+    :param path: Path to the file.
+    :return: Context manager of the view of the file.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                yield view
+
+
+def _view_chunks(view: memoryview) -> Iterator[memoryview]:
+    """
+    Helper function. Chunks of PACKER_READ_CHUNK_SIZE bytes of the view.
+    A chunk is released when the next one is requested,
+    so it must not be kept.
+    """
+    for offset in range(0, len(view), PACKER_READ_CHUNK_SIZE):
+        with view[offset:offset + PACKER_READ_CHUNK_SIZE] as chunk:
+            yield chunk
+
+
+def _file_chunks(path: str) -> Iterator[memoryview]:
+    """Helper function. Chunks of the mapped file, see _view_chunks."""
+    with map_file(path) as view:
+        yield from _view_chunks(view)
+
+
+class _Digest:
+    """Size and sha256 of data written by chunks."""
+
+    def __init__(self):
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def result(self) -> dict:
+        return {'size': self.size, 'sha256': self._sha256.hexdigest()}
+
+
+def _digest(chunks: Iterable[bytes]) -> dict:
+    """Helper function. Size and sha256 of the chunks."""
+    digest = _Digest()
+    for chunk in chunks:
+        digest.write(chunk)
+    return digest.result()
+
+
+def _zip_member_digest(zip_file: zipfile.ZipFile, name: str) -> dict:
+    """
+    Helper function. Decompress the member by chunks, ZipExtFile
+    checks its CRC at the end. Members of one ZipFile are read
+    concurrently, decompression releases the GIL.
+    """
+    with zip_file.open(name) as member:
+        return _digest(iter(lambda: member.read(PACKER_READ_CHUNK_SIZE), b''))
+
+
+def walk_files(source_dir: str, paths: list[str]) -> Iterator[str]:
+    """
+    Walk files of the paths recursively. Directories are read
+    with os.scandir one at a time, so the tree is never listed
+    in advance.
+    :param source_dir: Directory the paths are relative to.
+    :param paths: Files and directories relative to source_dir.
+    :return: Iterator of paths of files relative to source_dir,
+    separated by '/'.
+    """
+    for path in paths:
+        if not os.path.isdir(f'{source_dir}/{path}'):
+            yield path
+            continue
+        directories = [path]
+        while directories:
+            directory = directories.pop()
+            subdirectories = []
+            with os.scandir(f'{source_dir}/{directory}') as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(f'{directory}/{entry.name}')
+                    else:
+                        yield f'{directory}/{entry.name}'
+            directories.extend(reversed(subdirectories))
+
+
+def _compress_file(
+        file_path: str,
+        arcname: str,
+        compresslevel: int = None,
+        policy: str = None
+) -> tuple[zipfile.ZipInfo, tempfile.SpooledTemporaryFile, dict | None]:
+    """
+    Compress a file into a stream of a zip member.
+    :param file_path: Path to the source file.
+    :param arcname: Name of the member in the archive.
+    :param compresslevel: Deflate level, zlib default if not specified.
+    :param policy: Adaptive compression policy. Deflate if not specified.
+    :return: Member info, compressed data and entry of the compression
+    report if the policy is specified.
+    """
+    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    entry = None
+    if policy:
+        entry = {
+            'file': arcname,
+            'size': zinfo.file_size,
+            'sample_ratio': round(sample_ratio(file_path), 3)
+        }
+        zinfo.compress_type, compresslevel, entry['method'] = zip_method(
+            entry['sample_ratio'], policy
+        )
+    else:
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        # The LZMA stream ends with the end of stream marker.
+        zinfo.flag_bits |= 0x02
+    compressor = get_compressor(zinfo.compress_type, compresslevel)
+    compressed = tempfile.SpooledTemporaryFile(PACKER_READ_CHUNK_SIZE)
+    crc = 0
+    for chunk in _file_chunks(file_path):
+        crc = zlib.crc32(chunk, crc)
+        compressed.write(compressor.compress(chunk) if compressor else chunk)
+    if compressor:
+        compressed.write(compressor.flush())
+    zinfo.CRC = crc
+    zinfo.compress_size = compressed.tell()
+    compressed.seek(0)
+    return zinfo, compressed, entry
+
+
+class _SplitZipWriter:
+    """
+    Writer of a split zip archive: volumes name.z01, name.z02, ...
+    and the last volume name.zip of at most volume_size bytes each.
+    Members are compressed on the fly and followed by data
+    descriptors, their data flows across volume boundaries,
+    so neither a member nor the archive is kept in memory.
+    Local headers, data descriptors and records of the central
+    directory are never split between volumes.
+    """
+
+    def __init__(self, directory: str, name: str, volume_size: int):
+        """
+        :param directory: Directory of the volumes.
+        :param name: Filename of the archive without extension.
+        :param volume_size: Maximum size of a volume in bytes.
+        """
+        self.directory = directory
+        self.name = name
+        self.volume_size = volume_size
+        self.volumes = []
+        self._members = []
+        self._file = None
+        self._offset = 0
+        self._next_volume()
+        self._write(struct.pack('<L', SPLIT_ZIP_SIGNATURE))
+
+    def __enter__(self) -> '_SplitZipWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        self._file.close()
+        for volume in self.volumes:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(f'{self.directory}/{volume}')
+
+    @property
+    def _disk(self) -> int:
+        """Helper property. Number of the current volume from 0."""
+        return len(self.volumes) - 1
+
+    def _next_volume(self) -> None:
+        """Helper method. Close the current volume and open the next."""
+        if self._file:
+            self._file.close()
+        self.volumes.append(f'{self.name}.z{len(self.volumes) + 1:02d}')
+        self._file = open(f'{self.directory}/{self.volumes[-1]}', 'wb')
+        self._offset = 0
+
+    def _write(self, data: bytes) -> None:
+        """Helper method. Write data, continuing in the next volumes."""
+        view = memoryview(data)
+        while view:
+            if self._offset == self.volume_size:
+                self._next_volume()
+            size = min(len(view), self.volume_size - self._offset)
+            self._file.write(view[:size])
+            self._offset += size
+            view = view[size:]
+
+    def _write_record(self, record: bytes) -> tuple[int, int]:
+        """
+        Helper method. Write the record in one volume.
+        :return: Number of the volume and offset of the record in it.
+        """
+        if self._offset + len(record) > self.volume_size:
+            self._next_volume()
+        position = self._disk, self._offset
+        self._write(record)
+        return position
+
+    def write_member(
+            self,
+            zinfo: zipfile.ZipInfo,
+            chunks: Iterable[bytes],
+            file_size: int = None,
+            compresslevel: int = None
+    ) -> None:
+        """
+        Compress the member into the archive.
+        :param zinfo: Member info with the name, date and compress type.
+        :param chunks: Data of the member.
+        :param file_size: Size of the data, None if it is unknown.
+        :param compresslevel: Compression level of the compress type.
+        """
+        zinfo.flag_bits |= 0x08
+        if zinfo.compress_type == zipfile.ZIP_LZMA:
+            # The LZMA stream ends with the end of stream marker.
+            zinfo.flag_bits |= 0x02
+        zip64 = file_size is None or file_size * 1.05 > zipfile.ZIP64_LIMIT
+        disk, zinfo.header_offset = self._write_record(
+            zinfo.FileHeader(zip64)
+        )
+        compressor = get_compressor(zinfo.compress_type, compresslevel)
+        crc = file_size = compress_size = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            data = compressor.compress(chunk) if compressor else chunk
+            compress_size += len(data)
+            self._write(data)
+        if compressor:
+            data = compressor.flush()
+            compress_size += len(data)
+            self._write(data)
+        zinfo.CRC = crc
+        zinfo.file_size = file_size
+        zinfo.compress_size = compress_size
+        self._write_record(struct.pack(
+            '<LLQQ' if zip64 else '<LLLL',
+            DATA_DESCRIPTOR_SIGNATURE, crc, compress_size, file_size
+        ))
+        self._members.append((zinfo, disk))
+
+    @staticmethod
+    def _central_record(zinfo: zipfile.ZipInfo, disk: int) -> bytes:
+        """
+        Helper method. Record of the member in the central directory,
+        the way ZipFile writes it, with the number of its volume.
+        """
+        dt = zinfo.date_time
+        dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+        dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+        extra = []
+        file_size, compress_size = zinfo.file_size, zinfo.compress_size
+        if (zinfo.file_size > zipfile.ZIP64_LIMIT
+                or zinfo.compress_size > zipfile.ZIP64_LIMIT):
+            extra.extend((zinfo.file_size, zinfo.compress_size))
+            file_size = compress_size = 0xffffffff
+        header_offset = zinfo.header_offset
+        if zinfo.header_offset > zipfile.ZIP64_LIMIT:
+            extra.append(zinfo.header_offset)
+            header_offset = 0xffffffff
+        extra_data = zinfo.extra
+        min_version = 0
+        if extra:
+            extra_data = struct.pack(
+                '<HH' + 'Q' * len(extra), 1, 8 * len(extra), *extra
+            ) + strip_extra(extra_data, (1,))
+            min_version = zipfile.ZIP64_VERSION
+        if zinfo.compress_type == zipfile.ZIP_LZMA:
+            min_version = max(zipfile.LZMA_VERSION, min_version)
+        filename, flag_bits = encode_filename_flags(zinfo)
+        return struct.pack(
+            zipfile.structCentralDir,
+            zipfile.stringCentralDir,
+            max(min_version, zinfo.create_version),
+            zinfo.create_system,
+            max(min_version, zinfo.extract_version),
+            zinfo.reserved,
+            flag_bits,
+            zinfo.compress_type,
+            dostime,
+            dosdate,
+            zinfo.CRC,
+            compress_size,
+            file_size,
+            len(filename),
+            len(extra_data),
+            len(zinfo.comment),
+            min(disk, 0xffff),
+            zinfo.internal_attr,
+            zinfo.external_attr,
+            header_offset
+        ) + filename + extra_data + zinfo.comment
+
+    def close(self) -> list[str]:
+        """
+        Write the central directory and the end records. The last
+        volume is renamed to name.zip, an archive that fits in one
+        volume is marked as not split.
+        :return: Filenames of the volumes in order.
+        """
+        cd_disk, cd_offset = self._disk, self._offset
+        cd_size, record_disks = 0, []
+        for index, (zinfo, disk) in enumerate(self._members):
+            record = self._central_record(zinfo, disk)
+            position = self._write_record(record)
+            if index == 0:
+                cd_disk, cd_offset = position
+            record_disks.append(position[0])
+            cd_size += len(record)
+        entries = len(self._members)
+
+        zip64 = (
+            entries > zipfile.ZIP_FILECOUNT_LIMIT
+            or cd_size > zipfile.ZIP64_LIMIT
+            or cd_offset > zipfile.ZIP64_LIMIT
+            or self._disk >= 0xffff
+        )
+        end_size = zipfile.sizeEndCentDir + (
+            zipfile.sizeEndCentDir64 + zipfile.sizeEndCentDir64Locator
+            if zip64
+            else 0
+        )
+        if self._offset + end_size > self.volume_size:
+            self._next_volume()
+        disk_entries = record_disks.count(self._disk)
+        end_record = b''
+        if zip64:
+            end_record = struct.pack(
+                zipfile.structEndArchive64,
+                zipfile.stringEndArchive64,
+                44, 45, 45,
+                self._disk, cd_disk, disk_entries, entries, cd_size, cd_offset
+            ) + struct.pack(
+                zipfile.structEndArchive64Locator,
+                zipfile.stringEndArchive64Locator,
+                self._disk, self._offset, self._disk + 1
+            )
+        end_record += struct.pack(
+            zipfile.structEndArchive,
+            zipfile.stringEndArchive,
+            min(self._disk, 0xffff),
+            min(cd_disk, 0xffff),
+            min(disk_entries, 0xffff),
+            min(entries, 0xffff),
+            min(cd_size, 0xffffffff),
+            min(cd_offset, 0xffffffff),
+            0
+        )
+        self._write(end_record)
+        self._file.close()
+
+        if len(self.volumes) == 1:
+            with open(f'{self.directory}/{self.volumes[0]}', 'r+b') as f:
+                f.write(struct.pack('<L', SINGLE_ZIP_SIGNATURE))
+        os.replace(
+            f'{self.directory}/{self.volumes[-1]}',
+            f'{self.directory}/{self.name}.zip'
+        )
+        self.volumes[-1] = f'{self.name}.zip'
+        return self.volumes
 
 
 class IPacker(abc.ABC):
     """Packer interface."""
+    EXTENSION = ''
+    # Packers that can check their archives (verify) implement
+    # _member_digests(executor, volumes), returning the size and sha256
+    # of every member of the written archive by name.
+    SUPPORTS_VERIFY = False
 
     def __init__(
             self,
-            data: io.BytesIO | list,
+            data: io.BytesIO | list | Iterator[bytes],
             archive_filename: str,
             max_size_mb: int = None,
             inner_filename: str = INNER_FILENAME,
             inner_file_format: str = '',
             source_dir: str = INPUT_DIR,
-            path_output_files: str = OUTPUT_DIR
+            path_output_files: str = OUTPUT_DIR,
+            workers: int = PACKER_WORKERS,
+            compresslevel: int = ZIP_COMPRESSION_LEVEL,
+            policy: str = COMPRESSION_POLICY,
+            incremental: bool = False,
+            verify: bool = VERIFY_ARCHIVE
     ):
+        """
+        :param policy: Adaptive compression of files: 'fastest' or
+        'smallest' chooses the method of every file by a sample of it
+        and saves the report {archive_filename}-compression.json.
+        Not specified - the default method of the archive.
+        :param incremental: Update the existing archive of files:
+        only new and changed files are compressed. The state of packed
+        files is saved in {archive_filename}{EXTENSION}-files.json.
+        :param verify: Check the archive when it is written, see
+        verify_archive. Packed sources are deleted only after the check.
+        """
+        check_policy(policy)
+        if verify:
+            self._check_verification()
         self.data = data
         self.archive_filename = archive_filename
         self.inner_filename = f"{inner_filename}{inner_file_format}"
         self.max_size_mb = max_size_mb
         self.source_dir = source_dir
         self.path_output_files = path_output_files
+        self.workers = workers
+        self.compresslevel = compresslevel
+        self.policy = policy
+        self.compression_report = []
+        self.incremental = incremental
+        self.update_stats = {'copied': 0, 'compressed': 0, 'removed': 0}
+        self.verify = verify
+        # Files of the data list written to the archive.
+        self.packed_files = []
+        self.verification = None
+        # Volumes of the written archive, see output_files.
+        self.volumes = None
 
     @abc.abstractmethod
     def create_archive(self, delete_after=False) -> None:
         """
-        Create archive from filelist or buffer and save to the file.
+        Create archive from filelist, buffer or iterator of bytes chunks
+        and save to the file.
         :param delete_after: Flag for deleting source files after packaging.
         """
 
@@ -42,118 +628,600 @@ class IPacker(abc.ABC):
         :param delete_after: Delete temp 7z files after packaging.
         """
 
+    def create_volumes(self, delete_after=False) -> list[str]:
+        """
+        Creates the archive split into volumes of the specified size
+        as the final result, in a single compression pass.
+        A manifest with the list of volumes is saved next to them.
+        :param delete_after: Flag for deleting source files after packaging.
+        :return: List of volume filenames.
+        """
+
+    def _reject_data(self) -> None:
+        """Helper method. Fail on data of an unsupported type."""
+        logger.error(
+            f'{self.__class__.__qualname__} - '
+            f'неподдерживаемый тип data: {type(self.data).__qualname__}'
+        )
+        raise ValueError(
+            'Аргумент data должен быть списком путей к файлам, '
+            'io.BytesIO или итератором байтов'
+        )
+
+    def _check_verification(self) -> None:
+        """Helper method. Fail if the packer cannot check its archives."""
+        if not self.SUPPORTS_VERIFY:
+            logger.error(
+                f'{self.__class__.__qualname__} - '
+                f'упаковщик не поддерживает проверку архива'
+            )
+            raise ValueError(
+                f'Упаковщик {self.__class__.__qualname__} '
+                f'не поддерживает проверку архива'
+            )
+
+    def verify_archive(self, volumes: list[str] = None) -> dict:
+        """
+        Check the written archive without extracting it to disk.
+        Members are decompressed by chunks in a thread pool while the
+        sources are hashed, the CRC of every member is checked, packed
+        files of the data list are compared with the sources by size
+        and sha256.
+        :param volumes: Filenames of the volumes, the archive
+        of create_archive if not specified.
+        :return: Report: archive, numbers of members and compared
+        sources, size of the data.
+        """
+        self._check_verification()
+        archive_name = f'{self.archive_filename}{self.EXTENSION}'
+        errors = []
+        with concurrent.futures.ThreadPoolExecutor(
+                VERIFY_WORKERS or os.cpu_count() or 1
+        ) as executor:
+            sources = {
+                file_path: executor.submit(
+                    _digest, _file_chunks(f'{self.source_dir}/{file_path}')
+                )
+                for file_path in self.packed_files
+            }
+            try:
+                members = self._member_digests(executor, volumes)
+            except Exception as e:
+                members = {}
+                errors.append(f'архив не читается: {e!r}')
+                for future in sources.values():
+                    future.cancel()
+            else:
+                for file_path, future in sources.items():
+                    if file_path not in members:
+                        errors.append(f'{file_path}: нет в архиве')
+                    elif members[file_path] != future.result():
+                        errors.append(
+                            f'{file_path}: не совпадает с исходным файлом'
+                        )
+        if errors:
+            logger.error(
+                f'{self.__class__.__qualname__} - архив {archive_name} '
+                f'не прошёл проверку: {"; ".join(errors)}'
+            )
+            raise ArchiveVerificationError(
+                f'Архив {archive_name} не прошёл проверку: {errors[0]}'
+            )
+        self.verification = {
+            'archive': archive_name,
+            'members': len(members),
+            'sources': len(sources),
+            'size': sum(member['size'] for member in members.values())
+        }
+        return self.verification
+
+    def _finish(self, delete_after: bool, volumes: list[str] = None) -> None:
+        """
+        Helper method. Check the written archive if required
+        and only then delete the packed source files.
+        :param volumes: Filenames of the volumes of the archive.
+        """
+        self.volumes = volumes
+        if self.verify:
+            self.verify_archive(volumes)
+        if delete_after and isinstance(self.data, list):
+            for file_path in self.packed_files:
+                os.remove(f'{self.source_dir}/{file_path}')
+            self._remove_source_dirs()
+
+    def output_files(self) -> list[str]:
+        """
+        Paths of the files written by the last create method:
+        the volumes of create_volumes or the archive.
+        :return: List of paths.
+        """
+        if self.volumes:
+            return [
+                f'{self.path_output_files}/{volume}' for volume in self.volumes
+            ]
+        return [f'{OUTPUT_DIR}/{self.archive_filename}{self.EXTENSION}']
+
+    def _members(self) -> list[str]:
+        """Helper method. Names of the files inside the archive."""
+        if isinstance(self.data, list):
+            return list(self._source_files())
+        return [self.inner_filename]
+
+    def _source_files(self) -> Iterator[str]:
+        """Helper method. Files of the data list, directories recursively."""
+        return walk_files(self.source_dir, self.data)
+
+    def _sample(self, file_path: str) -> dict:
+        """Helper method. Entry of the compression report of the file."""
+        full_path = f'{self.source_dir}/{file_path}'
+        return {
+            'file': file_path,
+            'size': os.path.getsize(full_path),
+            'sample_ratio': round(sample_ratio(full_path), 3)
+        }
+
+    def _write_compression_report(self) -> None:
+        """Helper method. Save the compression report next to the archive."""
+        if self.policy:
+            write_report(
+                f'{self.path_output_files}/'
+                f'{self.archive_filename}-compression.json',
+                self.policy,
+                self.compression_report
+            )
+
+    def _files_manifest_path(self) -> str:
+        """Helper method. Path to the state of packed files."""
+        return (
+            f'{self.path_output_files}/'
+            f'{self.archive_filename}{self.EXTENSION}-files.json'
+        )
+
+    def _load_files_manifest(self) -> dict:
+        """
+        Helper method. Load the state of files of the previous archive.
+        :return: Dict of size, mtime and sha256 by path, empty
+        if the archive or the manifest is missing.
+        """
+        if not os.path.exists(
+                f'{OUTPUT_DIR}/{self.archive_filename}{self.EXTENSION}'
+        ):
+            return {}
+        try:
+            with open(self._files_manifest_path(), encoding='utf-8') as f:
+                return json.load(f)['files']
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_files_manifest(self, files: dict) -> None:
+        """Helper method. Save the state of packed files."""
+        path = self._files_manifest_path()
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    'archive': f'{self.archive_filename}{self.EXTENSION}',
+                    'files': files
+                },
+                f,
+                ensure_ascii=False,
+                indent=2
+            )
+        os.replace(f'{path}.tmp', path)
+
+    def _file_state(self, file_path: str, previous: dict = None) -> tuple:
+        """
+        Helper method. Current state of the source file.
+        The content is hashed only if the size or mtime has changed.
+        :param file_path: Path relative to source_dir.
+        :param previous: State from the previous manifest.
+        :return: State and flag of changed content.
+        """
+        full_path = f'{self.source_dir}/{file_path}'
+        stat = os.stat(full_path)
+        if (previous
+                and previous['size'] == stat.st_size
+                and previous['mtime_ns'] == stat.st_mtime_ns):
+            return previous, False
+        with map_file(full_path) as view:
+            sha256 = hashlib.sha256(view).hexdigest()
+        state = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256
+        }
+        return state, not previous or previous['sha256'] != state['sha256']
+
+    def _remove_source_dirs(self) -> None:
+        """
+        Helper method. Remove directories of the data list emptied
+        by deleting packed files. Directories with new files are kept.
+        """
+        for path in self.data:
+            top = f'{self.source_dir}/{path}'
+            if not os.path.isdir(top):
+                continue
+            for directory, _, _ in os.walk(top, topdown=False):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+
+    def _write_volumes_manifest(
+            self,
+            archive_name: str,
+            volumes: list[str],
+            members: list[str] = None
+    ) -> str:
+        """
+        Helper method. Save manifest of archive volumes next to them.
+        :param archive_name: Filename of the whole archive.
+        :param volumes: Filenames of the volumes in order.
+        :param members: Names of the files inside the archive.
+        :return: Filename of the manifest.
+        """
+        volumes_info = []
+        for volume in volumes:
+            sha256 = hashlib.sha256()
+            with open(f'{self.path_output_files}/{volume}', 'rb') as f:
+                while chunk := f.read(PACKER_READ_CHUNK_SIZE):
+                    sha256.update(chunk)
+            volumes_info.append({
+                'name': volume,
+                'size': os.path.getsize(f'{self.path_output_files}/{volume}'),
+                'sha256': sha256.hexdigest()
+            })
+        manifest = f'{archive_name}-manifest.json'
+        with open(
+                f'{self.path_output_files}/{manifest}', 'w', encoding='utf-8'
+        ) as f:
+            json.dump(
+                {
+                    'archive': archive_name,
+                    'volume_size': self.max_size_mb * 1024 * 1024,
+                    'volumes': volumes_info,
+                    'members': members or self._members()
+                },
+                f,
+                ensure_ascii=False,
+                indent=2
+            )
+        return manifest
+
 
 class PackerZip(IPacker):
+    EXTENSION = '.zip'
+    SUPPORTS_VERIFY = True
+
     def _create_archive_from_buffer(self) -> None:
-        """Helper method. Create archive from buffer"""
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.writestr(self.inner_filename, self.data.getvalue())
-        zip_buffer.seek(0)
-        with open(f'{OUTPUT_DIR}/{self.archive_filename}.zip', 'wb') as f:
-            f.write(zip_buffer.getvalue())
-
-    def _create_archive_from_files(self, delete_after=False):
+        """
+        Helper method. Create archive from buffer. The buffer is
+        compressed through its view straight into the archive file.
+        """
+        with zipfile.ZipFile(
+                f'{OUTPUT_DIR}/{self.archive_filename}.zip',
+                'w',
+                zipfile.ZIP_DEFLATED,
+                compresslevel=self.compresslevel
+        ) as zip_file, self.data.getbuffer() as view:
+            zip_file.writestr(self.inner_filename, view)
+
+    def _create_archive_from_stream(self) -> None:
+        """Helper method. Create archive from iterator of bytes chunks"""
+        with zipfile.ZipFile(
+                f'{OUTPUT_DIR}/{self.archive_filename}.zip',
+                'w',
+                zipfile.ZIP_DEFLATED,
+                compresslevel=self.compresslevel
+        ) as zip_file:
+            zinfo = zipfile.ZipInfo(self.inner_filename, time.localtime()[:6])
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            set_compresslevel(zinfo, self.compresslevel)
+            with zip_file.open(zinfo, 'w', force_zip64=True) as inner_file:
+                for chunk in self.data:
+                    inner_file.write(chunk)
+
+    def _create_archive_from_files(self):
         """Helper method. Create archive from files"""
         with zipfile.ZipFile(
                 f'{OUTPUT_DIR}/{self.archive_filename}.zip',
                 'w',
-                zipfile.ZIP_DEFLATED
+                zipfile.ZIP_DEFLATED,
+                compresslevel=self.compresslevel
         ) as zip_file:
-            for file_path in self.data:
-                zip_file.write(f'{self.source_dir}/{file_path}', file_path)
-                if delete_after:
-                    os.remove(f'{self.source_dir}/{file_path}')
+            for file_path in self._source_files():
+                self._write_file(zip_file, file_path)
+                self.packed_files.append(file_path)
+        self._write_compression_report()
 
-    def create_archive(self, delete_after=False) -> None:
-        if isinstance(self.data, io.BytesIO):
-            self._create_archive_from_buffer()
-        elif isinstance(self.data, list):
-            self._create_archive_from_files(delete_after)
-        else:
-            logger.error(
-                f'{self.__class__.__qualname__} - аргумент data '
-                f'должен быть list или io.BytesIO'
+    def _write_file(self, zip_file: zipfile.ZipFile, file_path: str) -> None:
+        """
+        Helper method. Compress the source file into the archive
+        with the method chosen by the compression policy.
+        """
+        compress_type, compresslevel = None, None
+        if self.policy:
+            entry = self._sample(file_path)
+            compress_type, compresslevel, entry['method'] = zip_method(
+                entry['sample_ratio'], self.policy
             )
-            raise ValueError('Аргумент data должен быть list или io.BytesIO')
-
-    def create_one_archive_from_parts(self, delete_after=False) -> None:
-        """Method not available for zip archive"""
-        logger.error(
-            f'{self.__class__.__qualname__} - '
-            f'Method not available for zip archive'
+            self.compression_report.append(entry)
+        zip_file.write(
+            f'{self.source_dir}/{file_path}',
+            file_path,
+            compress_type,
+            compresslevel
         )
-        raise TypeError('Method not available for zip archive')
 
+    def _update_archive_from_files(self) -> None:
+        """
+        Helper method. Update the archive of files: new and changed
+        files are compressed, compressed data of unchanged members
+        is copied from the previous archive as is.
+        The new archive replaces the previous one when it is complete.
+        """
+        archive_path = f'{OUTPUT_DIR}/{self.archive_filename}.zip'
+        previous_files = self._load_files_manifest()
+        previous_zip = (
+            zipfile.ZipFile(archive_path) if previous_files else None
+        )
+        previous_names = (
+            set(previous_zip.namelist()) if previous_zip else set()
+        )
+        files = {}
+        try:
+            with zipfile.ZipFile(
+                    f'{archive_path}.tmp',
+                    'w',
+                    zipfile.ZIP_DEFLATED,
+                    compresslevel=self.compresslevel
+            ) as zip_file:
+                for file_path in self._source_files():
+                    state, changed = self._file_state(
+                        file_path, previous_files.get(file_path)
+                    )
+                    if (changed
+                            or file_path not in previous_names):
+                        self._write_file(zip_file, file_path)
+                        self.update_stats['compressed'] += 1
+                    else:
+                        self._copy_member(
+                            previous_zip, zip_file, file_path
+                        )
+                        self.update_stats['copied'] += 1
+                    files[file_path] = state
+                    self.packed_files.append(file_path)
+        finally:
+            if previous_zip:
+                previous_zip.close()
+        os.replace(f'{archive_path}.tmp', archive_path)
+        self.update_stats['removed'] = len(previous_files.keys() - files.keys())
+        self._save_files_manifest(files)
+        self._write_compression_report()
 
-class Packer7z(IPacker):
-    def _create_archive_from_buffer(self) -> None:
-        """Helper method. Create archive from buffer"""
-        with py7zr.SevenZipFile(
-                file=f'{OUTPUT_DIR}/{self.archive_filename}.7z',
-                mode='w'
-        ) as archive:
-            archive.writestr(self.data.getvalue(), self.inner_filename)
-
-    def _create_archive_from_files(self, delete_after=False) -> None:
-        """Helper method. Create archive from files"""
-        with py7zr.SevenZipFile(
-                f'{OUTPUT_DIR}/{self.archive_filename}.7z',
-                'w'
-        ) as archive:
-            for file_path in self.data:
-                archive.write(f'{self.source_dir}/{file_path}', file_path)
-                if delete_after:
-                    os.remove(f'{self.source_dir}/{file_path}')
-
-    def _create_partition(
+    def _copy_member(
             self,
-            partition_archive_filename: str,
-            max_size_mb: int,
-        ) -> None:
-        """
-        Helper method for 7z. Creates archive volumes from buffer.
-        :param partition_archive_filename: Filename for partition archive.
-        :param max_size_mb: Maximum volume size.
-        """
-        with multivolumefile.open(
-            f'{OUTPUT_DIR}/{partition_archive_filename}', mode='wb', volume=max_size_mb * 1024 * 1024
-        ) as target_archive:
-            with py7zr.SevenZipFile(target_archive, 'w') as archive:
-                if isinstance(self.data, io.BytesIO):
-                    archive.writestr(self.data.getvalue(), self.inner_filename)
-                elif isinstance(self.data, list):
-                    archive.writeall(INPUT_DIR, '')
-                elif isinstance(self.data, str):
-                    archive.write(self.data, '')
-                else:
-                    logger.error(
-                        f'{self.__class__.__qualname__} - '
-                        f'Argument data must be list or io.BytesIO'
-                    )
-                    raise ValueError(
-                        'Argument data must be list or io.BytesIO'
-                    )
+            source_zip: zipfile.ZipFile,
+            zip_file: zipfile.ZipFile,
+            name: str
+    ) -> None:
+        """
+        Helper method. Copy compressed data of the member
+        to another archive without decompressing it.
+        """
+        source_info = source_zip.getinfo(name)
+        zinfo = zipfile.ZipInfo(name, source_info.date_time)
+        for attr in (
+                'compress_type', 'create_system', 'create_version',
+                'extract_version', 'external_attr', 'internal_attr',
+                'comment', 'CRC', 'compress_size', 'file_size'
+        ):
+            setattr(zinfo, attr, getattr(source_info, attr))
+        # Sizes are known, the data descriptor is not needed.
+        zinfo.flag_bits = source_info.flag_bits & ~0x08
+        zinfo.extra = strip_extra(source_info.extra, (1,))
+        self._write_compressed_member(
+            zip_file,
+            zinfo,
+            _LimitedReader(
+                open_raw_member(source_zip, source_info),
+                source_info.compress_size
+            )
+        )
+
+    def _create_archive_from_files_parallel(self):
+        """
+        Helper method. Create archive from files, compressing members
+        concurrently in a thread pool. Members are written in the order
+        of the file list.
+        """
+        with zipfile.ZipFile(
+                f'{OUTPUT_DIR}/{self.archive_filename}.zip', 'w'
+        ) as zip_file, concurrent.futures.ThreadPoolExecutor(
+                self.workers
+        ) as executor:
+            pending = collections.deque()
+            files = self._source_files()
+            while True:
+                while len(pending) < self.workers * 2:
+                    file_path = next(files, None)
+                    if file_path is None:
+                        break
+                    pending.append((file_path, executor.submit(
+                        _compress_file,
+                        f'{self.source_dir}/{file_path}',
+                        file_path,
+                        self.compresslevel,
+                        self.policy
+                    )))
+                if not pending:
+                    break
+                file_path, future = pending.popleft()
+                zinfo, compressed, entry = future.result()
+                if entry:
+                    self.compression_report.append(entry)
+                with compressed:
+                    self._write_compressed_member(zip_file, zinfo, compressed)
+                self.packed_files.append(file_path)
+        self._write_compression_report()
+
+    @staticmethod
+    def _write_compressed_member(
+            zip_file: zipfile.ZipFile,
+            zinfo: zipfile.ZipInfo,
+            compressed: io.IOBase
+    ) -> None:
+        """
+        Helper method. Write already compressed member to the archive,
+        the way ZipFile writes its own members.
+        """
+        write_raw_member(
+            zip_file, zinfo, compressed, PACKER_READ_CHUNK_SIZE
+        )
 
     def create_archive(self, delete_after=False) -> None:
         if isinstance(self.data, io.BytesIO):
             self._create_archive_from_buffer()
+        elif isinstance(self.data, list) and self.incremental:
+            self._update_archive_from_files()
+        elif isinstance(self.data, list) and self.workers > 1:
+            self._create_archive_from_files_parallel()
         elif isinstance(self.data, list):
-            self._create_archive_from_files(delete_after)
+            self._create_archive_from_files()
+        elif isinstance(self.data, Iterator):
+            self._create_archive_from_stream()
         else:
-            logger.error(
-                f'{self.__class__.__qualname__} - '
-                f'аргумент data должен быть list или io.BytesIO'
-            )
-            raise ValueError('Аргумент data должен быть list или io.BytesIO')
+            self._reject_data()
+        self._finish(delete_after)
+
+    def _member_digests(
+            self,
+            executor: concurrent.futures.Executor,
+            volumes: list[str] = None
+    ) -> dict:
+        """
+        Helper method. Decompress all members of the written archive
+        without extracting them, checking their CRC. Members are
+        decompressed concurrently, split archives are read as one file
+        joined from the volumes.
+        :param executor: Thread pool of the check.
+        :param volumes: Filenames of the volumes of the archive.
+        :return: Size and sha256 of every member by name.
+        """
+        with contextlib.ExitStack() as stack:
+            if volumes:
+                reader = stack.enter_context(_VolumeReader([
+                    f'{self.path_output_files}/{volume}' for volume in volumes
+                ]))
+                zip_file = stack.enter_context(_open_split_zip(reader))
+            else:
+                zip_file = stack.enter_context(zipfile.ZipFile(
+                    f'{OUTPUT_DIR}/{self.archive_filename}.zip'
+                ))
+            futures = {
+                name: executor.submit(_zip_member_digest, zip_file, name)
+                for name in zip_file.namelist()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _write_split_members(self, writer: _SplitZipWriter) -> list[str]:
+        """
+        Helper method. Compress the data into the split archive.
+        :return: Names of the members.
+        """
+        if isinstance(self.data, list):
+            members = []
+            for file_path in self._source_files():
+                full_path = f'{self.source_dir}/{file_path}'
+                zinfo = zipfile.ZipInfo.from_file(full_path, file_path)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                compresslevel = self.compresslevel
+                if self.policy:
+                    entry = self._sample(file_path)
+                    zinfo.compress_type, compresslevel, entry['method'] = (
+                        zip_method(entry['sample_ratio'], self.policy)
+                    )
+                    self.compression_report.append(entry)
+                writer.write_member(
+                    zinfo,
+                    _file_chunks(full_path),
+                    zinfo.file_size,
+                    compresslevel
+                )
+                members.append(file_path)
+                self.packed_files.append(file_path)
+            return members
+
+        zinfo = zipfile.ZipInfo(self.inner_filename, time.localtime()[:6])
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.external_attr = 0o600 << 16
+        if isinstance(self.data, io.BytesIO):
+            with self.data.getbuffer() as view:
+                writer.write_member(
+                    zinfo, _view_chunks(view), len(view), self.compresslevel
+                )
+        elif isinstance(self.data, Iterator):
+            writer.write_member(zinfo, self.data, None, self.compresslevel)
+        else:
+            self._reject_data()
+        return [self.inner_filename]
+
+    def _create_split_archive(
+            self,
+            archive_filename: str
+    ) -> tuple[list[str], list[str]]:
+        """
+        Helper method. Create the split archive archive_filename.z01,
+        archive_filename.z02, ..., archive_filename.zip in a single
+        compression pass, replacing volumes of a previous archive.
+        :return: Filenames of the volumes and names of the members.
+        """
+        volume_pattern = re.compile(rf'{re.escape(archive_filename)}\.z\d{{2,}}')
+        for file in os.listdir(self.path_output_files):
+            if volume_pattern.fullmatch(file):
+                os.remove(f'{self.path_output_files}/{file}')
+        with _SplitZipWriter(
+                self.path_output_files,
+                archive_filename,
+                self.max_size_mb * 1024 * 1024
+        ) as writer:
+            members = self._write_split_members(writer)
+        self._write_compression_report()
+        return writer.volumes, members
 
     def create_one_archive_from_parts(self, delete_after=False) -> None:
-        part_archive_filename = 'temp.7z'
-        self._create_partition(part_archive_filename, self.max_size_mb)
-        self.data = [
-            file
-            for file in os.listdir(self.path_output_files)
-            if file.startswith(part_archive_filename)
-        ]
-        self.source_dir = OUTPUT_DIR
-        self.create_archive(delete_after=delete_after)
+        """
+        Creates the split archive of the specified volume size and packs
+        its volumes into one archive. Volumes are compressed already,
+        so they are stored.
+        :param delete_after: Delete the volumes after packaging.
+        """
+        volumes, _ = self._create_split_archive(
+            f'temp_{self.archive_filename}'
+        )
+        with zipfile.ZipFile(
+                f'{OUTPUT_DIR}/{self.archive_filename}.zip',
+                'w',
+                zipfile.ZIP_STORED
+        ) as zip_file:
+            for volume in volumes:
+                zip_file.write(f'{self.path_output_files}/{volume}', volume)
+        self.data = volumes
+        self.source_dir = self.path_output_files
+        self.packed_files = list(volumes)
+        self._finish(delete_after)
+
+    def create_volumes(self, delete_after=False) -> list[str]:
+        """
+        Creates the split zip archive output.z01, output.z02, ...,
+        output.zip with volumes of the specified size, compressed
+        in one pass without keeping the archive in memory.
+        A manifest with the list of volumes is saved next to them.
+        :param delete_after: Flag for deleting source files after packaging.
+        :return: List of volume filenames.
+        """
+        volumes, members = self._create_split_archive(self.archive_filename)
+        self._write_volumes_manifest(
+            f'{self.archive_filename}.zip', volumes, members
+        )
+        self._finish(delete_after, volumes)
+        return volumes
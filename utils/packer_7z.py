@@ -0,0 +1,355 @@
+import concurrent.futures
+import contextlib
+import io
+import multivolumefile
+import os
+import py7zr
+import re
+
+from typing import Iterable, Iterator
+
+from config import logger, OUTPUT_DIR, INCOMPRESSIBLE_RATIO, SEVENZIP_ZSTD
+from utils.packer import IPacker, _Digest
+
+try:
+    import pyzstd
+except ImportError:
+    pyzstd = None
+
+try:
+    from py7zr.helpers import MemIO
+except ImportError:
+    MemIO = None
+
+
+def sevenzip_filters(report: list[dict], policy: str) -> tuple[list, str]:
+    """
+    Choose filters of a 7z archive. py7zr compresses all members
+    of an archive with the same filters, so the choice is made
+    for the archive: it is stored if most bytes ('fastest')
+    or all bytes ('smallest') are incompressible. 'fastest' uses
+    LZMA2 preset 1, zstd only if SEVENZIP_ZSTD is set.
+    :param report: Sizes and sample ratios of the members.
+    :param policy: 'fastest' or 'smallest'.
+    :return: Filters and name of the method.
+    """
+    total = sum(entry['size'] for entry in report)
+    incompressible = sum(
+        entry['size']
+        for entry in report
+        if entry['sample_ratio'] >= INCOMPRESSIBLE_RATIO
+    )
+    stored = (
+        incompressible * 2 > total
+        if policy == 'fastest'
+        else incompressible == total
+    )
+    if total and stored:
+        return [{'id': py7zr.FILTER_COPY}], 'copy'
+    if policy == 'fastest':
+        if SEVENZIP_ZSTD and pyzstd is not None:
+            return [{'id': py7zr.FILTER_ZSTD, 'level': 1}], 'zstd-1'
+        return [{'id': py7zr.FILTER_LZMA2, 'preset': 1}], 'lzma2-1'
+    return [{'id': py7zr.FILTER_LZMA2, 'preset': 9}], 'lzma2-9'
+
+
+class ChunkReader(io.BufferedIOBase):
+    """
+    Read-only file object over an iterator of bytes chunks.
+    Lets py7zr compress data while it is being produced.
+    The size of the stream is unknown, so tell() and seek() are stubs.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.chunks = iter(chunks)
+        self.buffer = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return 0
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+class _DigestFile(MemIO or io.RawIOBase):
+    """Output file of the py7zr worker hashing data instead of keeping it."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.digest = _Digest()
+
+    def write(self, data: bytes) -> int:
+        return self.digest.write(data)
+
+    def seek(self, position: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _member_digests_7z(archive: py7zr.SevenZipFile) -> dict:
+    """
+    Helper function. Decompress all members of the archive straight
+    into digests. py7zr can read members only into memory or to disk
+    through its public API, so the worker is given digest files
+    directly. This is the only use of py7zr internals, checked with
+    the version pinned in requirements.txt; another version without
+    them fails here instead of checking the archive wrongly.
+    :param archive: Archive opened for reading.
+    :return: Size and sha256 of every member by name.
+    """
+    worker = getattr(archive, 'worker', None)
+    if (MemIO is None
+            or not hasattr(worker, 'register_filelike')
+            or not hasattr(worker, 'extract')
+            or not hasattr(archive, '_filePassed')):
+        logger.error(
+            f'_member_digests_7z - py7zr {py7zr.__version__} '
+            f'не поддерживает проверку архива'
+        )
+        raise RuntimeError(
+            f'py7zr {py7zr.__version__} не поддерживает проверку архива'
+        )
+    files = {}
+    for member in archive.files:
+        if member.is_directory:
+            continue
+        files[member.filename] = _DigestFile()
+        worker.register_filelike(member.id, files[member.filename])
+    worker.extract(archive.fp, None, parallel=not archive._filePassed)
+    return {name: file.digest.result() for name, file in files.items()}
+
+
+class Packer7z(IPacker):
+    EXTENSION = '.7z'
+    SUPPORTS_VERIFY = True
+
+    def _create_archive_from_buffer(self) -> None:
+        """Helper method. Create archive from buffer"""
+        with py7zr.SevenZipFile(
+                file=f'{OUTPUT_DIR}/{self.archive_filename}.7z',
+                mode='w'
+        ) as archive:
+            self._write_buffer(archive)
+
+    def _write_buffer(self, archive: py7zr.SevenZipFile) -> None:
+        """
+        Helper method. Write the buffer to the archive. py7zr reads
+        the BytesIO itself, writestr would copy the data twice.
+        """
+        self.data.seek(0)
+        archive.writef(self.data, self.inner_filename)
+
+    def _create_archive_from_stream(self) -> None:
+        """Helper method. Create archive from iterator of bytes chunks"""
+        with py7zr.SevenZipFile(
+                file=f'{OUTPUT_DIR}/{self.archive_filename}.7z',
+                mode='w'
+        ) as archive:
+            archive.writef(ChunkReader(self.data), self.inner_filename)
+
+    def _plan_files(self) -> tuple[Iterable[str], list | None]:
+        """
+        Helper method. Files of the data list and filters of the archive.
+        With the compression policy all files are sampled in advance,
+        as the filters are set for the whole archive.
+        :return: Files and filters, None for the default filters.
+        """
+        if not self.policy:
+            return self._source_files(), None
+        report = [self._sample(file_path) for file_path in self._source_files()]
+        filters, method = sevenzip_filters(report, self.policy)
+        for entry in report:
+            entry['method'] = method
+        self.compression_report.extend(report)
+        self._write_compression_report()
+        return [entry['file'] for entry in report], filters
+
+    def _update_archive_from_files(self) -> None:
+        """
+        Helper method. Update the archive of files. py7zr can only
+        append to an archive, so new files are appended when no files
+        have been changed or removed, otherwise the archive is rebuilt.
+        """
+        archive_path = f'{OUTPUT_DIR}/{self.archive_filename}.7z'
+        previous_files = self._load_files_manifest()
+        files, new_files = {}, []
+        rebuild = not previous_files
+        for file_path in self._source_files():
+            previous = previous_files.get(file_path)
+            files[file_path], changed = self._file_state(file_path, previous)
+            if changed and previous:
+                rebuild = True
+            elif changed:
+                new_files.append(file_path)
+        removed = len(previous_files.keys() - files.keys())
+        if rebuild or removed:
+            self._create_archive_from_files()
+            self.update_stats['compressed'] = len(files)
+        else:
+            if new_files:
+                with py7zr.SevenZipFile(archive_path, 'a') as archive:
+                    for file_path in new_files:
+                        archive.write(
+                            f'{self.source_dir}/{file_path}', file_path
+                        )
+            self.update_stats['compressed'] = len(new_files)
+            self.update_stats['copied'] = len(files) - len(new_files)
+            self.packed_files.extend(files)
+        self.update_stats['removed'] = removed
+        self._save_files_manifest(files)
+
+    def _create_archive_from_files(self) -> None:
+        """Helper method. Create archive from files"""
+        files, filters = self._plan_files()
+        with py7zr.SevenZipFile(
+                f'{OUTPUT_DIR}/{self.archive_filename}.7z',
+                'w',
+                filters=filters
+        ) as archive:
+            for file_path in files:
+                archive.write(f'{self.source_dir}/{file_path}', file_path)
+                self.packed_files.append(file_path)
+
+    def _create_partition(
+            self,
+            partition_archive_filename: str,
+            max_size_mb: int,
+        ) -> None:
+        """
+        Helper method for 7z. Creates archive volumes from buffer.
+        :param partition_archive_filename: Filename for partition archive.
+        :param max_size_mb: Maximum volume size.
+        """
+        files, filters = (
+            self._plan_files() if isinstance(self.data, list) else ([], None)
+        )
+        with multivolumefile.open(
+            f'{OUTPUT_DIR}/{partition_archive_filename}', mode='wb', volume=max_size_mb * 1024 * 1024
+        ) as target_archive:
+            with py7zr.SevenZipFile(
+                    target_archive, 'w', filters=filters
+            ) as archive:
+                if isinstance(self.data, io.BytesIO):
+                    self._write_buffer(archive)
+                elif isinstance(self.data, list):
+                    for file_path in files:
+                        archive.write(
+                            f'{self.source_dir}/{file_path}', file_path
+                        )
+                elif isinstance(self.data, Iterator):
+                    archive.writef(
+                        ChunkReader(self.data), self.inner_filename
+                    )
+                elif isinstance(self.data, str):
+                    archive.write(self.data, '')
+                else:
+                    self._reject_data()
+
+    def create_archive(self, delete_after=False) -> None:
+        if isinstance(self.data, io.BytesIO):
+            self._create_archive_from_buffer()
+        elif isinstance(self.data, list) and self.incremental:
+            self._update_archive_from_files()
+        elif isinstance(self.data, list):
+            self._create_archive_from_files()
+        elif isinstance(self.data, Iterator):
+            self._create_archive_from_stream()
+        else:
+            self._reject_data()
+        self._finish(delete_after)
+
+    def _member_digests(
+            self,
+            executor: concurrent.futures.Executor,
+            volumes: list[str] = None
+    ) -> dict:
+        """
+        Helper method. Members are written by the py7zr worker straight
+        into digests. A solid archive is one stream, its members are
+        decompressed one after another while the sources are hashed
+        in the pool, separate blocks are decompressed in parallel.
+        """
+        with contextlib.ExitStack() as stack:
+            file = (
+                stack.enter_context(multivolumefile.open(
+                    f'{self.path_output_files}/{self.archive_filename}.7z',
+                    mode='rb'
+                ))
+                if volumes
+                else f'{OUTPUT_DIR}/{self.archive_filename}.7z'
+            )
+            archive = stack.enter_context(py7zr.SevenZipFile(file))
+            return _member_digests_7z(archive)
+
+    def create_one_archive_from_parts(self, delete_after=False) -> None:
+        part_archive_filename = f'temp_{self.archive_filename}.7z'
+        self._create_partition(part_archive_filename, self.max_size_mb)
+        self.data = sorted(
+            file
+            for file in os.listdir(self.path_output_files)
+            if file.startswith(part_archive_filename)
+        )
+        self.source_dir = OUTPUT_DIR
+        self.create_archive(delete_after=delete_after)
+
+    def create_volumes(self, delete_after=False) -> list[str]:
+        archive_name = f'{self.archive_filename}.7z'
+        files, filters = (
+            self._plan_files() if isinstance(self.data, list) else ([], None)
+        )
+        volume_pattern = re.compile(rf'{re.escape(archive_name)}\.\d{{3}}')
+        for file in os.listdir(self.path_output_files):
+            if volume_pattern.fullmatch(file):
+                os.remove(f'{self.path_output_files}/{file}')
+
+        with multivolumefile.MultiVolume(
+                f'{self.path_output_files}/{archive_name}',
+                mode='wb',
+                volume=self.max_size_mb * 1024 * 1024,
+                ext_digits=3
+        ) as target_archive:
+            members = []
+            with py7zr.SevenZipFile(
+                    target_archive, 'w', filters=filters
+            ) as archive:
+                if isinstance(self.data, io.BytesIO):
+                    self._write_buffer(archive)
+                elif isinstance(self.data, list):
+                    for file_path in files:
+                        archive.write(
+                            f'{self.source_dir}/{file_path}', file_path
+                        )
+                        members.append(file_path)
+                        self.packed_files.append(file_path)
+                elif isinstance(self.data, Iterator):
+                    archive.writef(
+                        ChunkReader(self.data), self.inner_filename
+                    )
+                else:
+                    self._reject_data()
+
+        volumes = sorted(
+            file
+            for file in os.listdir(self.path_output_files)
+            if volume_pattern.fullmatch(file)
+        )
+        self._write_volumes_manifest(archive_name, volumes, members)
+        self._finish(delete_after, volumes)
+        return volumes
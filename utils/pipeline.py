@@ -0,0 +1,231 @@
+import multiprocessing
+import queue
+import threading
+
+from mimesis import Locale
+from typing import Iterator
+
+from config import (
+    OUTPUT_DIR,
+    OUTPUT_FILENAME,
+    STREAM_CHUNK_ROWS,
+    GENERATOR_ENGINE,
+    PIPELINE_QUEUE_SIZE,
+    UNIQUE_STRATEGY,
+    VERIFY_ARCHIVE
+)
+from utils.file_creator import IFileCreator
+from utils.generator import create_person_generator
+from utils.packer import IPacker
+from utils.schema import Schema
+from utils.unique import create_unique_filter
+
+_END = 'end'
+_QUEUE_TIMEOUT = 0.1
+
+
+class PipelineCancelled(Exception):
+    """A downstream stage has stopped, the stage must finish."""
+
+
+def _put(stage_queue, item, stop) -> None:
+    """
+    Helper function. Put item into a bounded queue,
+    giving up when the pipeline is stopped.
+    """
+    while True:
+        try:
+            stage_queue.put(item, timeout=_QUEUE_TIMEOUT)
+            return
+        except queue.Full:
+            if stop.is_set():
+                raise PipelineCancelled
+
+
+def _put_error(stage_queue, error: Exception, stop) -> None:
+    """Helper function. Pass the error of the stage downstream."""
+    try:
+        _put(stage_queue, ('error', error), stop)
+    except PipelineCancelled:
+        pass
+
+
+def _iter_queue(stage_queue, stop) -> Iterator:
+    """
+    Helper function. Iterate items of the stage queue until the end.
+    An exception of the upstream stage is raised in the consumer.
+    """
+    while True:
+        try:
+            kind, item = stage_queue.get(timeout=_QUEUE_TIMEOUT)
+        except queue.Empty:
+            if stop.is_set():
+                raise PipelineCancelled
+            continue
+        if kind == _END:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def _generate_stage(
+        rows_queue,
+        stop,
+        number_of_lines: int,
+        locale: Locale | dict[Locale, float],
+        engine: str,
+        seed: int,
+        start_row: int,
+        schema: Schema,
+        unique: list[str],
+        unique_strategy: str
+) -> None:
+    """
+    Generation stage. Puts chunks of rows into the queue.
+    Runs in a separate process or thread.
+    """
+    try:
+        person_generator = create_person_generator(locale, engine, schema)
+        if seed is not None and start_row is None:
+            person_generator.reseed(seed)
+        unique_filter = (
+            create_unique_filter(
+                unique,
+                person_generator,
+                unique_strategy,
+                number_of_lines,
+                seed=seed,
+                start_row=start_row or 0
+            )
+            if unique
+            else None
+        )
+        for start in range(0, number_of_lines, STREAM_CHUNK_ROWS):
+            lines = min(STREAM_CHUNK_ROWS, number_of_lines - start)
+            rows = (
+                person_generator.generate_random_to_list(lines)
+                if start_row is None
+                else list(person_generator.generate_range_to_generator(
+                    seed, start_row + start, start_row + start + lines
+                ))
+            )
+            if unique_filter:
+                rows = list(unique_filter.apply(rows))
+            _put(rows_queue, ('rows', rows), stop)
+        _put(rows_queue, (_END, None), stop)
+    except PipelineCancelled:
+        if hasattr(rows_queue, 'cancel_join_thread'):
+            rows_queue.cancel_join_thread()
+    except Exception as e:
+        _put_error(rows_queue, e, stop)
+
+
+def _serialize_stage(
+        rows_queue,
+        bytes_queue: queue.Queue,
+        stop: threading.Event,
+        data_file: type[IFileCreator]
+) -> None:
+    """Serialization stage. Puts chunks of the file into the queue."""
+    def rows() -> Iterator[tuple]:
+        for chunk in _iter_queue(rows_queue, stop):
+            yield from chunk
+
+    try:
+        for chunk in data_file(rows()).create_to_stream():
+            _put(bytes_queue, ('bytes', chunk), stop)
+        _put(bytes_queue, (_END, None), stop)
+    except PipelineCancelled:
+        return
+    except Exception as e:
+        _put_error(bytes_queue, e, stop)
+
+
+def run_pipeline(
+        number_of_lines: int,
+        data_file: type[IFileCreator],
+        packer: type[IPacker] = None,
+        output_filename: str = OUTPUT_FILENAME,
+        inner_file_format: str = '',
+        locale: Locale | dict[Locale, float] = Locale.RU,
+        engine: str = GENERATOR_ENGINE,
+        seed: int = None,
+        start_row: int = None,
+        processes: bool = True,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        schema: Schema = None,
+        unique: list[str] = None,
+        unique_strategy: str = UNIQUE_STRATEGY,
+        verify: bool = VERIFY_ARCHIVE
+) -> list[str]:
+    """
+    Generate, serialize and compress data in concurrent stages
+    connected by bounded queues of row chunks and byte chunks,
+    so the total time approaches the time of the slowest stage.
+    Generation runs in a separate process, serialization in a thread,
+    compression (which releases the GIL) in the calling thread.
+    :param number_of_lines: Number of lines.
+    :param data_file: File creator class.
+    :param packer: Packer class. Without packer the file is written as is.
+    :param output_filename: Name of the output file without extension.
+    :param inner_file_format: Extension of the data file.
+    :param locale: Locale of generated data or weights of locales.
+    :param engine: Generator engine.
+    :param seed: Seed of the generator.
+    :param start_row: Generate rows from this index of the seekable data
+    of the seed (see PersonGenerator.generate_row_at).
+    :param processes: Run generation in a process instead of a thread.
+    :param queue_size: Maximum number of chunks waiting in each queue.
+    :param schema: Columns of generated rows.
+    :param unique: Names of the columns with unique values.
+    :param unique_strategy: Replacing of duplicates, 'suffix' or 'resample'.
+    :param verify: Check the written archive.
+    :return: Paths of the written archive or file.
+    """
+    if processes:
+        stop = multiprocessing.Event()
+        rows_queue = multiprocessing.Queue(queue_size)
+        worker = multiprocessing.Process
+    else:
+        stop = threading.Event()
+        rows_queue = queue.Queue(queue_size)
+        worker = threading.Thread
+    bytes_queue = queue.Queue(queue_size)
+
+    generate = worker(
+        target=_generate_stage,
+        args=(
+            rows_queue, stop, number_of_lines, locale, engine, seed,
+            start_row, schema, unique, unique_strategy
+        ),
+        daemon=True
+    )
+    serialize = threading.Thread(
+        target=_serialize_stage,
+        args=(rows_queue, bytes_queue, stop, data_file),
+        daemon=True
+    )
+    generate.start()
+    serialize.start()
+    try:
+        if packer:
+            archive = packer(
+                _iter_queue(bytes_queue, stop),
+                output_filename,
+                inner_file_format=inner_file_format,
+                verify=verify
+            )
+            archive.create_archive()
+            output_files = archive.output_files()
+        else:
+            path = f'{OUTPUT_DIR}/{output_filename}{inner_file_format}'
+            output_files = [path]
+            with open(path, 'wb') as f:
+                for chunk in _iter_queue(bytes_queue, stop):
+                    f.write(chunk)
+    finally:
+        stop.set()
+        serialize.join()
+        generate.join()
+    return output_files
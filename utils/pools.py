@@ -0,0 +1,260 @@
+import calendar
+import mimesis
+import os
+import pickle
+
+from datetime import date
+from mimesis import Person, Locale
+from mimesis.datasets import EMAIL_DOMAINS, USERNAMES
+from random import Random
+from string import ascii_letters, digits, punctuation
+
+from config import logger, CACHE_DIR
+from utils.schema import DEFAULT_COLUMNS
+
+BIRTH_YEARS = (1980, 2023)
+USERNAME_YEARS = (1800, 2100)
+WEIGHT_RANGE = (38, 90)
+HEIGHT_RANGE = (150, 200)
+PASSWORD_LENGTH = 8
+PASSWORD_CHARACTERS = ascii_letters + digits + punctuation
+# Version of the saved pools. Increase it when PersonPools or the ranges
+# above change, so pools saved by older code are not loaded.
+POOLS_FORMAT = 1
+
+_PASSWORD_LIMIT = 256 // len(PASSWORD_CHARACTERS) * len(PASSWORD_CHARACTERS)
+_PASSWORD_TABLE = bytes(
+    ord(PASSWORD_CHARACTERS[byte % len(PASSWORD_CHARACTERS)])
+    if byte < _PASSWORD_LIMIT else 0
+    for byte in range(256)
+)
+_PASSWORD_REJECTED = bytes(range(_PASSWORD_LIMIT, 256))
+
+# Person method of the column and the method of PoolSampler.
+COLUMN_METHODS = {
+    column: 'nationalities' if column == 'nationality' else f'{column}s'
+    for column in DEFAULT_COLUMNS
+}
+
+_pools_cache = {}
+
+
+def _groups(values: dict | list) -> tuple[tuple, ...]:
+    """
+    Helper function. Convert values of the dataset to groups.
+    Values separated by gender give one group per gender.
+    :param values: List of values or dict of lists by gender.
+    :return: Tuple of groups.
+    """
+    if isinstance(values, dict):
+        return tuple(tuple(group) for group in values.values())
+    return (tuple(values),)
+
+
+def _birthdates() -> tuple[tuple, ...]:
+    """
+    Helper function. Birthdates grouped by year and month,
+    as Person.birthdate chooses year, then month, then day.
+    :return: Tuple of groups.
+    """
+    return tuple(
+        tuple(
+            date(year, month, day)
+            for day in range(1, calendar.monthrange(year, month)[1] + 1)
+        )
+        for year in range(BIRTH_YEARS[0], BIRTH_YEARS[1] + 1)
+        for month in range(1, 13)
+    )
+
+
+def _heights() -> tuple[tuple, ...]:
+    """
+    Helper function. Heights as Person.height rounds them: the bounds
+    have half the probability of the values between them.
+    :return: Tuple of groups.
+    """
+    values = [
+        f'{value / 100:0.2f}'
+        for value in range(HEIGHT_RANGE[0], HEIGHT_RANGE[1] + 1)
+    ]
+    middle = [value for value in values[1:-1] for _ in range(2)]
+    return ((values[0], *middle, values[-1]),)
+
+
+def grouped_choice_column(rng: Random, groups: tuple, n: int) -> list:
+    """
+    Choose n values: a uniform group first, then a uniform value in it.
+    :param rng: Random generator.
+    :param groups: Tuple of groups of values.
+    :param n: Number of values.
+    :return: List of values.
+    """
+    if len(groups) == 1:
+        return rng.choices(groups[0], k=n)
+    random = rng.random
+    return [
+        group[int(random() * len(group))]
+        for group in rng.choices(groups, k=n)
+    ]
+
+
+def password_column(rng: Random, n: int, length: int = PASSWORD_LENGTH) -> list:
+    """
+    Generate n passwords like Person.password.
+    Random bytes out of the uniform range are rejected.
+    :param rng: Random generator.
+    :param n: Number of passwords.
+    :param length: Length of password.
+    :return: List of passwords.
+    """
+    size = n * length
+    chars = b''
+    while len(chars) < size:
+        chars += rng.randbytes(size - len(chars) + size // 4 + 8).translate(
+            _PASSWORD_TABLE, _PASSWORD_REJECTED
+        )
+    chars = chars[:size].decode('ascii')
+    return [chars[i:i + length] for i in range(0, size, length)]
+
+
+class PersonPools:
+    """Precomputed value pools of one locale for columnar generation."""
+
+    def __init__(self, person: Person):
+        dataset = person._dataset
+        self.first_names = _groups(dataset['names'])
+        self.last_names = _groups(dataset['surnames'])
+        self.nationalities = _groups(dataset['nationality'])
+        self.genders = tuple(dataset['gender'])
+        self.usernames = tuple(username.lower() for username in USERNAMES)
+        self.username_years = tuple(
+            str(year)
+            for year in range(USERNAME_YEARS[0], USERNAME_YEARS[1] + 1)
+        )
+        self.email_domains = tuple(
+            domain if domain.startswith('@') else f'@{domain}'
+            for domain in EMAIL_DOMAINS
+        )
+        self.weights = tuple(range(WEIGHT_RANGE[0], WEIGHT_RANGE[1] + 1))
+        self.heights = _heights()
+        self.birthdates = _birthdates()
+
+
+def _pools_path(locale: Locale) -> str:
+    """Helper function. Path to the pools file of the locale."""
+    return (
+        f'{CACHE_DIR}/pools-{locale.value}-{mimesis.__version__}'
+        f'-{POOLS_FORMAT}.pickle'
+    )
+
+
+def _load_pools(locale: Locale) -> PersonPools | None:
+    """Helper function. Load pools of the locale from disk, if saved."""
+    try:
+        with open(_pools_path(locale), 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, AttributeError) as e:
+        logger.error(f'_load_pools - Повреждён файл пулов {locale}: {e!r}')
+        return None
+
+
+def _save_pools(locale: Locale, pools: PersonPools) -> None:
+    """Helper function. Save pools of the locale to disk."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _pools_path(locale)
+    with open(f'{path}.{os.getpid()}', 'wb') as f:
+        pickle.dump(pools, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{path}.{os.getpid()}', path)
+
+
+def get_pools(locale: Locale, person: Person = None) -> PersonPools:
+    """
+    Get value pools for the locale. Pools are built once per locale
+    and saved to disk, so later runs load them without mimesis.
+    :param locale: Locale of the pools.
+    :param person: Already created provider of the locale, if any.
+    :return: Value pools.
+    """
+    if locale not in _pools_cache:
+        pools = _load_pools(locale)
+        if pools is None:
+            pools = PersonPools(person or Person(locale=locale))
+            _save_pools(locale, pools)
+        _pools_cache[locale] = pools
+    return _pools_cache[locale]
+
+
+class PoolSampler:
+    """
+    Random person data drawn in bulk from the value pools of a locale.
+    Distributions match the mimesis Person methods.
+    """
+
+    def __init__(
+            self,
+            locale: Locale = Locale.RU,
+            seed: int = None,
+            person: Person = None
+    ):
+        """
+        :param person: Mimesis provider of the locale to share
+        the random generator with.
+        """
+        self.pools = get_pools(locale, person)
+        self.random = person.random if person else Random(seed)
+
+    def reseed(self, seed: int = None) -> None:
+        """Reseed the random generator."""
+        self.random.seed(seed)
+
+    def first_names(self, n: int) -> list:
+        return grouped_choice_column(self.random, self.pools.first_names, n)
+
+    def last_names(self, n: int) -> list:
+        return grouped_choice_column(self.random, self.pools.last_names, n)
+
+    def genders(self, n: int) -> list:
+        return self.random.choices(self.pools.genders, k=n)
+
+    def weights(self, n: int) -> list:
+        return self.random.choices(self.pools.weights, k=n)
+
+    def usernames(self, n: int) -> list:
+        return list(map(
+            '{}_{}'.format,
+            self.random.choices(self.pools.usernames, k=n),
+            self.random.choices(self.pools.username_years, k=n)
+        ))
+
+    def emails(self, n: int) -> list:
+        return list(map(
+            '{}{}{}'.format,
+            self.random.choices(self.pools.usernames, k=n),
+            self.random.choices(self.pools.username_years, k=n),
+            self.random.choices(self.pools.email_domains, k=n)
+        ))
+
+    def passwords(self, n: int) -> list:
+        return password_column(self.random, n)
+
+    def birthdates(self, n: int) -> list:
+        return grouped_choice_column(self.random, self.pools.birthdates, n)
+
+    def heights(self, n: int) -> list:
+        return grouped_choice_column(self.random, self.pools.heights, n)
+
+    def nationalities(self, n: int) -> list:
+        return grouped_choice_column(self.random, self.pools.nationalities, n)
+
+    def block(self, n: int, columns: list[str] = DEFAULT_COLUMNS) -> list:
+        """
+        Generate rows column by column and zip them.
+        :param n: Number of rows.
+        :param columns: Names of Person methods of the columns.
+        :return: List of rows in the order of the columns.
+        """
+        return list(zip(*(
+            getattr(self, COLUMN_METHODS[column])(n) for column in columns
+        )))
@@ -0,0 +1,120 @@
+import importlib
+import threading
+import time
+
+from config import logger, FILE_FORMAT_ENTRY_POINTS, PACKER_ENTRY_POINTS
+
+
+class Registry:
+    """
+    Implementations registered by name and imported on first use.
+    Built-in implementations are registered as 'module:attribute'
+    strings, so a job imports only the modules it needs together
+    with their dependencies (xlsxwriter, py7zr, ...).
+    Third-party implementations are found through entry points
+    of the group, e.g. in pyproject.toml of a plugin:
+    [project.entry-points."data_generator.file_formats"]
+    parquet = "my_plugin:ParquetFileCreator"
+    """
+
+    def __init__(self, kind: str, group: str):
+        """
+        :param kind: Description of implementations for messages.
+        :param group: Entry point group of third-party implementations.
+        """
+        self.kind = kind
+        self.group = group
+        self._targets = {}
+        self._entry_points = None
+        self._loaded = {}
+        self._lock = threading.Lock()
+        # Import time of every loaded implementation, in seconds.
+        self.load_times = {}
+
+    def register(self, name: str, target) -> None:
+        """
+        Register the implementation.
+        :param name: Name of the implementation, e.g. 'csv'.
+        :param target: 'module:attribute' string or the implementation.
+        """
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+
+    def _find_entry_points(self) -> dict:
+        """
+        Helper method. Entry points of the group by name. They are
+        looked up once and only for names that are not registered,
+        as scanning of installed packages slows down the start.
+        """
+        if self._entry_points is None:
+            from importlib import metadata
+
+            self._entry_points = {
+                entry_point.name: entry_point
+                for entry_point in metadata.entry_points(group=self.group)
+            }
+        return self._entry_points
+
+    def names(self) -> list[str]:
+        """Names of all implementations, loaded or not."""
+        return sorted(self._targets.keys() | self._find_entry_points().keys())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._targets or name in self._find_entry_points()
+
+    def get(self, name: str):
+        """
+        Get the implementation, importing it on the first call.
+        :param name: Name of the implementation.
+        :return: Implementation.
+        """
+        if name in self._loaded:
+            return self._loaded[name]
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            if name not in self:
+                logger.error(
+                    f'{self.__class__.__qualname__} - '
+                    f'Неизвестный {self.kind}: {name}'
+                )
+                raise KeyError(name)
+            start = time.perf_counter()
+            target = self._targets.get(name)
+            if target is None:
+                target = self._find_entry_points()[name].load()
+            elif isinstance(target, str):
+                module_name, _, attribute = target.partition(':')
+                target = getattr(
+                    importlib.import_module(module_name), attribute
+                )
+            self.load_times[name] = time.perf_counter() - start
+            self._loaded[name] = target
+            return target
+
+
+file_creators = Registry('формат файла', FILE_FORMAT_ENTRY_POINTS)
+file_creators.register('xlsx', 'utils.file_creator_xlsx:ExcelFileCreator')
+file_creators.register('csv', 'utils.file_creator:CsvFileCreator')
+file_creators.register('txt', 'utils.file_creator:TxtFileCreator')
+file_creators.register('columnar', 'utils.file_creator:ColumnarFileCreator')
+
+packers = Registry('архиватор', PACKER_ENTRY_POINTS)
+packers.register('zip', 'utils.packer:PackerZip')
+packers.register('7z', 'utils.packer_7z:Packer7z')
+
+
+def import_report(startup: float = None) -> str:
+    """
+    Report of import times of loaded formats and packers.
+    :param startup: Time from the start of the program
+    to the start of the first job, in seconds.
+    :return: Text of the report.
+    """
+    lines = ['Время импорта:']
+    if startup is not None:
+        lines.append(f'  запуск: {startup * 1000:.1f} мс')
+    for registry in (file_creators, packers):
+        for name, seconds in registry.load_times.items():
+            lines.append(f'  {registry.kind} {name}: {seconds * 1000:.1f} мс')
+    return '\n'.join(lines)
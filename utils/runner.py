@@ -0,0 +1,590 @@
+import concurrent.futures
+import json
+import os
+import threading
+
+from typing import Iterator, TYPE_CHECKING
+
+from config import (
+    logger,
+    OUTPUT_FILENAME,
+    OUTPUT_DIR,
+    INPUT_DIR,
+    METRICS_ENABLED,
+    UNIQUE_STRATEGY,
+    COMPRESSION_POLICY,
+    GENERATOR_WORKERS,
+    VERIFY_ARCHIVE
+)
+from utils.file_creator import ColumnarFileCreator, IFileCreator
+from utils.metrics import JobMetrics, NullMetrics
+from utils.models import FileFormat, PackerFormat, WorkFormat, PackerType
+from utils.packer import IPacker
+from utils.registry import Registry, file_creators, packers
+from utils.schema import Schema, DEFAULT_SCHEMA
+from utils.shards import ShardWriter
+from utils.unique import create_unique_filter
+from utils.userdata import UserData
+
+if TYPE_CHECKING:
+    from mimesis import Locale
+    from utils.generator import PersonGenerator
+
+# Names of the built-in formats and packers in the registries.
+FILE_CREATOR_NAMES = {
+    FileFormat.XLSX: 'xlsx',
+    FileFormat.CSV: 'csv',
+    FileFormat.TXT: 'txt',
+    FileFormat.COLUMNAR: 'columnar'
+}
+PACKER_NAMES = {
+    PackerFormat.ZIP: 'zip',
+    PackerFormat.FORMAT_7Z: '7z',
+    PackerFormat.NO_PACKER: None
+}
+
+JOB_WORK_FORMATS = {
+    'generator': WorkFormat.GENERATOR,
+    'packer': WorkFormat.PACKER
+}
+JOB_FILE_FORMATS = {
+    'xlsx': FileFormat.XLSX,
+    'csv': FileFormat.CSV,
+    'txt': FileFormat.TXT,
+    'columnar': FileFormat.COLUMNAR,
+    None: None
+}
+JOB_PACKER_FORMATS = {
+    'zip': PackerFormat.ZIP,
+    '7z': PackerFormat.FORMAT_7Z,
+    None: PackerFormat.NO_PACKER
+}
+JOB_KEYS = frozenset({
+    'work_format', 'rows', 'file_format', 'packer', 'max_size_mb',
+    'volumes', 'files', 'filename', 'pipeline', 'shard_rows',
+    'shard_size_mb', 'unique', 'unique_strategy', 'schema', 'columns',
+    'compression', 'incremental', 'seed', 'start_row', 'verify',
+    'locales', 'workers'
+})
+
+_local = threading.local()
+
+
+def get_file_creator(
+        file_format: FileFormat | str | None
+) -> type[IFileCreator] | None:
+    """
+    Get the file creator, importing it on first use.
+    :param file_format: Built-in format or name of a third-party format.
+    :return: File creator, None without a format.
+    """
+    if file_format is None:
+        return None
+    return file_creators.get(FILE_CREATOR_NAMES.get(file_format, file_format))
+
+
+def _with_header(
+        data_file: type[IFileCreator] | None,
+        header: list[str]
+) -> type[IFileCreator] | None:
+    """
+    Helper function. File creator writing the names of the columns
+    of generated rows. Only the columnar format stores names,
+    other creators are returned as is.
+    :param data_file: File creator class.
+    :param header: Names of the columns.
+    :return: File creator class.
+    """
+    if not (data_file and issubclass(data_file, ColumnarFileCreator)):
+        return data_file
+
+    class HeaderFileCreator(data_file):
+        def __init__(self, data, filename=None, output_dir=OUTPUT_DIR):
+            super().__init__(data, filename, output_dir, header=header)
+
+    HeaderFileCreator.__qualname__ = data_file.__qualname__
+    return HeaderFileCreator
+
+
+def get_packer(
+        packer_format: PackerFormat | str | None
+) -> type[IPacker] | None:
+    """
+    Get the packer, importing it on first use.
+    :param packer_format: Built-in packer or name of a third-party packer.
+    :return: Packer, None without a packer.
+    """
+    name = PACKER_NAMES.get(packer_format, packer_format)
+    return packers.get(name) if name else None
+
+
+def _job_choice(value: str | None, choices: dict, registry: Registry):
+    """
+    Helper function. Built-in format of the job value or the name
+    of a third-party format. Raises KeyError for unknown values.
+    """
+    if value in choices:
+        return choices[value]
+    if value in registry:
+        return value
+    raise KeyError(value)
+
+
+def _output_size(paths: list[str]) -> int:
+    """Helper function. Size of the written file, archive or volumes."""
+    return sum(os.path.getsize(path) for path in paths)
+
+
+def parse_locales(
+        value: str | dict | None
+) -> 'Locale | dict[Locale, float] | None':
+    """
+    Parse the locale or the mix of locales.
+    :param value: Name of the locale ('ru'), weights of locales
+    as a string 'ru=60,en=25,de=15' or a dict {'ru': 60, 'en': 25}.
+    :return: Locale, weights of locales or None if not specified.
+    """
+    if not value:
+        return None
+    from mimesis import Locale
+
+    try:
+        if isinstance(value, str) and '=' not in value:
+            return Locale(value.strip())
+        if isinstance(value, str):
+            value = dict(item.split('=', 1) for item in value.split(','))
+        weights = {
+            Locale(name.strip()): float(weight)
+            for name, weight in value.items()
+        }
+    except (AttributeError, TypeError, ValueError):
+        logger.error(f'parse_locales - Неверные локали: {value}')
+        raise ValueError(f'Неверные локали: {value}')
+    if not all(weight > 0 for weight in weights.values()):
+        logger.error(f'parse_locales - Неверные веса локалей: {value}')
+        raise ValueError('Веса локалей должны быть положительными числами')
+    return weights
+
+
+def create_generator(
+        locale: 'Locale | dict[Locale, float]' = None,
+        schema: Schema = None
+) -> 'PersonGenerator':
+    """
+    Create the generator of random data. mimesis is imported here,
+    so jobs of the packer do not load it.
+    :param locale: Locale of generated data or weights of locales
+    mixed in one data, Locale.RU by default.
+    :param schema: Columns of generated rows.
+    :return: Generator.
+    """
+    from mimesis import Locale
+    from utils.generator import create_person_generator
+
+    return create_person_generator(locale or Locale.RU, schema=schema)
+
+
+def _generate(
+        user_data: UserData,
+        person_generator: 'PersonGenerator',
+        unique: list[str],
+        unique_strategy: str,
+        seed: int = None,
+        start_row: int = 0,
+        workers: int = GENERATOR_WORKERS
+) -> Iterator[tuple]:
+    """
+    Helper function. Rows of a generator job. With several workers
+    chunks of rows are generated in a process pool and merged in order,
+    rows of the seed are the seekable data, the same for any number
+    of workers.
+    """
+    if workers != 1:
+        rows = person_generator.generate_parallel_to_generator(
+            user_data.number_of_lines,
+            seed=seed,
+            workers=workers,
+            start_row=None if seed is None else start_row
+        )
+    elif seed is None:
+        rows = person_generator.generate_random_to_generator(
+            user_data.number_of_lines
+        )
+    else:
+        rows = person_generator.generate_range_to_generator(
+            seed, start_row, start_row + user_data.number_of_lines
+        )
+    if not unique:
+        return rows
+    return create_unique_filter(
+        unique,
+        person_generator,
+        unique_strategy,
+        user_data.number_of_lines,
+        seed=seed,
+        start_row=start_row
+    ).apply(rows)
+
+
+def run_job(
+        user_data: UserData,
+        person_generator: 'PersonGenerator',
+        output_filename: str = OUTPUT_FILENAME,
+        pipeline: bool = False,
+        unique: list[str] = None,
+        unique_strategy: str = UNIQUE_STRATEGY,
+        compression: str = COMPRESSION_POLICY,
+        incremental: bool = False,
+        seed: int = None,
+        start_row: int = 0,
+        verify: bool = VERIFY_ARCHIVE,
+        workers: int = GENERATOR_WORKERS
+) -> None:
+    """
+    Run one job described by user data.
+    :param user_data: Filled user data.
+    :param person_generator: Generator of random data, not used
+    by jobs of the packer.
+    :param output_filename: Name of the output file without extension.
+    :param pipeline: Run generation, serialization and compression
+    of a generator job in concurrent stages.
+    :param unique: Names of the columns with unique values.
+    :param unique_strategy: Replacing of duplicates, 'suffix' or 'resample'.
+    :param compression: Adaptive compression of packed files,
+    'fastest' or 'smallest'.
+    :param incremental: Update the existing archive of files,
+    compressing only new and changed files.
+    :param seed: Master seed of the seekable data: every row is
+    a function of the seed and its index, see
+    PersonGenerator.generate_row_at. Random data without the seed.
+    :param start_row: Index of the first generated row of the seekable
+    data.
+    :param verify: Check written archives before deleting packed files.
+    :param workers: Number of processes generating rows, 1 - rows
+    are generated in the calling thread, None - CPU count.
+    """
+    metrics = (
+        JobMetrics(
+            output_filename,
+            work_format=user_data.work_format.name,
+            rows=user_data.number_of_lines,
+            file_format=getattr(
+                user_data.data_file_format, 'name', user_data.data_file_format
+            ),
+            packer=getattr(
+                user_data.packer_format, 'name', user_data.packer_format
+            ),
+            packer_type=getattr(user_data.packer_type, 'name', None)
+        )
+        if METRICS_ENABLED
+        else NullMetrics()
+    )
+
+    data_file = get_file_creator(user_data.data_file_format)
+    if user_data.work_format == WorkFormat.GENERATOR:
+        data_file = _with_header(data_file, person_generator.columns)
+    inner_file_format = data_file.EXTENSION if data_file else ''
+
+    if (user_data.work_format == WorkFormat.GENERATOR
+            and (user_data.rows_per_shard or user_data.shard_size_mb)):
+        with metrics.stage('shards') as stage:
+            shards = ShardWriter(
+                metrics.track(
+                    _generate(
+                        user_data, person_generator, unique, unique_strategy,
+                        seed, start_row, workers
+                    ),
+                    'generate'
+                ),
+                data_file,
+                inner_file_format,
+                output_filename,
+                rows_per_shard=user_data.rows_per_shard,
+                bytes_per_shard=(
+                    user_data.shard_size_mb * 1024 * 1024
+                    if user_data.shard_size_mb
+                    else None
+                ),
+                packer=get_packer(user_data.packer_format),
+                first_row=start_row,
+                seed=seed,
+                verify=verify
+            ).create()
+            stage.rows = user_data.number_of_lines
+            stage.bytes_in = sum(shard['size'] for shard in shards)
+        metrics.emit()
+        return
+
+    if (pipeline
+            and user_data.work_format == WorkFormat.GENERATOR
+            and user_data.packer_type != PackerType.PART_FILES
+            and user_data.packer_type != PackerType.VOLUMES):
+        from utils.pipeline import run_pipeline
+
+        with metrics.stage('pipeline') as stage:
+            output_files = run_pipeline(
+                user_data.number_of_lines,
+                data_file,
+                get_packer(user_data.packer_format),
+                output_filename,
+                inner_file_format,
+                locale=person_generator.locale,
+                engine=person_generator.engine,
+                seed=seed,
+                start_row=None if seed is None else start_row,
+                schema=person_generator.schema,
+                unique=unique,
+                unique_strategy=unique_strategy,
+                verify=verify
+            )
+            stage.rows = user_data.number_of_lines
+            stage.bytes_out = _output_size(output_files)
+        metrics.emit()
+        return
+
+    if user_data.work_format == WorkFormat.GENERATOR:
+        data = metrics.track(
+            _generate(
+                user_data, person_generator, unique, unique_strategy,
+                seed, start_row, workers
+            ),
+            'generate'
+        )
+    else:
+        data = user_data.files_for_packer
+
+    if user_data.packer_format == PackerFormat.NO_PACKER:
+        with metrics.stage('serialize') as stage:
+            filename = data_file(data, output_filename).create()
+            stage.bytes_out = _output_size([f'{OUTPUT_DIR}/{filename}'])
+        metrics.emit()
+        return
+
+    archive = get_packer(user_data.packer_format)
+    if user_data.work_format == WorkFormat.GENERATOR:
+        data = metrics.track(
+            data_file(data).create_to_stream(), 'serialize', count_bytes=True
+        )
+    with metrics.stage('compress') as stage:
+        if user_data.packer_type == PackerType.PART_FILES:
+            packer = archive(
+                data=data,
+                archive_filename=output_filename,
+                max_size_mb=user_data.max_size_mb,
+                inner_file_format=inner_file_format,
+                policy=compression,
+                verify=verify
+            )
+            packer.create_one_archive_from_parts(delete_after=True)
+        elif user_data.packer_type == PackerType.VOLUMES:
+            packer = archive(
+                data=data,
+                archive_filename=output_filename,
+                max_size_mb=user_data.max_size_mb,
+                inner_file_format=inner_file_format,
+                policy=compression,
+                verify=verify
+            )
+            packer.create_volumes()
+        else:
+            packer = archive(
+                data,
+                output_filename,
+                inner_file_format=inner_file_format,
+                policy=compression,
+                incremental=incremental,
+                verify=verify
+            )
+            packer.create_archive()
+        if user_data.work_format == WorkFormat.GENERATOR:
+            stage.bytes_in = metrics.get('serialize').bytes_out
+        stage.bytes_out = _output_size(packer.output_files())
+    metrics.emit()
+
+
+def load_jobs(path: str) -> list[tuple[UserData, str, dict]]:
+    """
+    Load jobs from a json file. The file contains a list of objects:
+    {"work_format": "generator" | "packer", "rows": int,
+    "file_format": "xlsx" | "csv" | "txt" | "columnar", "packer": "zip" | "7z" | null,
+    "max_size_mb": int | null, "volumes": bool, "files": [str] | null,
+    "filename": str, "pipeline": bool,
+    "shard_rows": int | null, "shard_size_mb": int | null,
+    "unique": ["username", "email"] | null,
+    "unique_strategy": "suffix" | "resample",
+    "schema": str | null, "columns": [str] | null,
+    "compression": "fastest" | "smallest" | null, "incremental": bool,
+    "seed": int | null, "start_row": int, "verify": bool,
+    "locales": {"ru": 60, "en": 25, "de": 15} | null,
+    "workers": int | null}
+    "file_format" and "packer" also take names of third-party formats
+    and packers registered through entry points.
+    Jobs of the generator require "rows" and "file_format", jobs
+    of the packer require "packer"; unknown keys are rejected.
+    With "volumes" the split archive is delivered as volumes
+    instead of being packed into one archive.
+    With "shard_rows" or "shard_size_mb" the data is written into
+    files output-00001.csv, output-00002.csv, ... with the manifest,
+    every file is archived separately.
+    "schema" is a path to the schema file of the columns of rows,
+    "columns" chooses columns of the schema or of the default columns.
+    "compression" chooses the compression method of every packed file.
+    With "incremental" the archive of files is updated, only new
+    and changed files are compressed.
+    With "seed" every row is a function of the seed and its index,
+    "start_row" chooses the first row, so any range of rows, e.g.
+    a lost shard, is generated again without the rows before it.
+    With "verify" written archives are decompressed and compared
+    with the packed files before the files are deleted.
+    "locales" mixes rows of several locales by weights.
+    "workers" generates rows in a pool of processes, null - CPU count.
+    :param path: Path to the job file.
+    :return: List of user data, output filename and options of run_job
+    for every job.
+    """
+    with open(path, encoding='utf-8') as f:
+        raw_jobs = json.load(f)
+
+    jobs = []
+    for index, job in enumerate(raw_jobs, start=1):
+        try:
+            if not isinstance(job, dict):
+                raise ValueError('задание должно быть объектом')
+            unknown = sorted(set(job) - JOB_KEYS)
+            if unknown:
+                raise ValueError(f'неизвестные ключи: {", ".join(unknown)}')
+            work_format = JOB_WORK_FORMATS[job.get('work_format', 'generator')]
+            if work_format == WorkFormat.GENERATOR:
+                if (not isinstance(job.get('rows'), int)
+                        or job['rows'] < 1):
+                    raise ValueError('rows должен быть целым числом от 1')
+                if job.get('file_format') is None:
+                    raise ValueError('не указан file_format')
+            elif job.get('packer') is None:
+                raise ValueError('не указан packer')
+            max_size_mb = job.get('max_size_mb')
+            user_data = UserData(
+                work_format=work_format,
+                number_of_lines=job.get('rows'),
+                data_file_format=_job_choice(
+                    job.get('file_format'), JOB_FILE_FORMATS, file_creators
+                ),
+                files_for_packer=(
+                    job.get('files') or os.listdir(INPUT_DIR)
+                    if work_format == WorkFormat.PACKER
+                    else None
+                ),
+                packer_format=_job_choice(
+                    job.get('packer'), JOB_PACKER_FORMATS, packers
+                ),
+                packer_type=(
+                    PackerType.ONE_FILE
+                    if not max_size_mb
+                    else PackerType.VOLUMES
+                    if job.get('volumes')
+                    else PackerType.PART_FILES
+                ),
+                max_size_mb=max_size_mb,
+                rows_per_shard=job.get('shard_rows'),
+                shard_size_mb=job.get('shard_size_mb')
+            )
+            options = {
+                'pipeline': job.get('pipeline', False),
+                'unique': job.get('unique'),
+                'unique_strategy': job.get('unique_strategy', UNIQUE_STRATEGY),
+                'compression': job.get('compression', COMPRESSION_POLICY),
+                'incremental': job.get('incremental', False),
+                'seed': job.get('seed'),
+                'start_row': job.get('start_row', 0),
+                'verify': job.get('verify', VERIFY_ARCHIVE),
+                'workers': job.get('workers', GENERATOR_WORKERS)
+            }
+            if (options['seed'] is not None
+                    and not isinstance(options['seed'], int)):
+                raise ValueError('seed должен быть целым числом')
+            if options['start_row'] and options['seed'] is None:
+                raise ValueError('start_row указывается только вместе с seed')
+            if (not isinstance(options['start_row'], int)
+                    or options['start_row'] < 0):
+                raise ValueError('start_row должен быть целым числом от 0')
+            if (options['workers'] is not None
+                    and (not isinstance(options['workers'], int)
+                         or options['workers'] < 1)):
+                raise ValueError('workers должен быть целым числом от 1')
+            if job.get('locales'):
+                options['locales'] = parse_locales(job['locales'])
+            if job.get('schema') or job.get('columns'):
+                schema = (
+                    Schema.load(job['schema'])
+                    if job.get('schema')
+                    else DEFAULT_SCHEMA
+                )
+                options['schema'] = (
+                    schema.select(job['columns'])
+                    if job.get('columns')
+                    else schema
+                )
+        except KeyError as e:
+            logger.error(f'load_jobs - Задание {index}: неверное значение {e}')
+            raise ValueError(f'Задание {index}: неверное значение {e}')
+        except ValueError as e:
+            logger.error(f'load_jobs - Задание {index}: {e}')
+            raise ValueError(f'Задание {index}: {e}')
+        jobs.append((
+            user_data,
+            job.get('filename', f'{OUTPUT_FILENAME}-{index}'),
+            options
+        ))
+    return jobs
+
+
+def _get_thread_generator(
+        locale: 'Locale | dict[Locale, float]'
+) -> 'PersonGenerator':
+    """Helper function. One warm generator per worker thread."""
+    if not hasattr(_local, 'person_generator'):
+        _local.person_generator = create_generator(locale)
+    return _local.person_generator
+
+
+def run_jobs(
+        jobs: list[tuple[UserData, str, dict]],
+        workers: int = 1,
+        locale: 'Locale | dict[Locale, float]' = None
+) -> list[str]:
+    """
+    Run all jobs in one process. Generators are created once
+    and reused between jobs, jobs with own schema or locales get own
+    generators,
+    jobs of the packer do not create them.
+    A failed job does not stop the others.
+    :param jobs: List of user data, output filename and options
+    of run_job for every job.
+    :param workers: Number of jobs running concurrently.
+    :param locale: Locale of generated data or weights of locales,
+    Locale.RU by default.
+    :return: Output filenames of failed jobs.
+    """
+    def run(job: tuple[UserData, str, dict]) -> None:
+        user_data, output_filename, options = job
+        options = dict(options)
+        schema = options.pop('schema', None)
+        locales = options.pop('locales', None)
+        if user_data.work_format != WorkFormat.GENERATOR:
+            person_generator = None
+        elif schema or locales:
+            person_generator = create_generator(locales or locale, schema)
+        else:
+            person_generator = _get_thread_generator(locale)
+        run_job(user_data, person_generator, output_filename, **options)
+
+    failed = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, job): job[1] for job in jobs}
+        for future, output_filename in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f'run_jobs - Задание {output_filename}: {e!r}')
+                failed.append(output_filename)
+    return failed
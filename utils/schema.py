@@ -0,0 +1,142 @@
+import functools
+import json
+
+from typing import Callable, TYPE_CHECKING
+
+from config import logger
+
+if TYPE_CHECKING:
+    from mimesis import Generic
+
+DEFAULT_COLUMNS = (
+    'first_name',
+    'last_name',
+    'gender',
+    'weight',
+    'username',
+    'email',
+    'password',
+    'birthdate',
+    'height',
+    'nationality'
+)
+
+
+class Column:
+    """Column of generated data: mimesis provider method and its arguments."""
+
+    def __init__(
+            self,
+            name: str,
+            provider: str = 'person',
+            method: str = None,
+            args: dict = None,
+            null_rate: float = 0.0
+    ):
+        """
+        :param name: Name of the column.
+        :param provider: Name of the mimesis provider, e.g. person, address.
+        :param method: Method of the provider. The name of the column
+        if not specified.
+        :param args: Keyword arguments of the method.
+        :param null_rate: Share of empty values (None), from 0 to 1.
+        """
+        if not 0 <= null_rate <= 1:
+            raise ValueError(f'Колонка {name}: null_rate должен быть от 0 до 1')
+        self.name = name
+        self.provider = provider
+        self.method = method or name
+        self.args = args or {}
+        self.null_rate = null_rate
+
+    def __repr__(self):
+        return f'Column({self.name!r}, {self.provider}.{self.method})'
+
+    def bind(self, generic: 'Generic') -> Callable:
+        """
+        Get the bound method of the provider with bound arguments.
+        :param generic: Mimesis providers of the locale.
+        :return: Function without arguments returning a value.
+        """
+        method = getattr(getattr(generic, self.provider, None), self.method, None)
+        if not callable(method):
+            logger.error(
+                f'Column.bind - Неизвестный метод '
+                f'{self.provider}.{self.method} колонки {self.name}'
+            )
+            raise ValueError(
+                f'Колонка {self.name}: неизвестный метод '
+                f'{self.provider}.{self.method}'
+            )
+        return functools.partial(method, **self.args) if self.args else method
+
+
+class Schema:
+    """
+    Declarative list of columns of generated rows.
+    The schema file is a json list of objects:
+    {"name": str, "provider": str, "method": str, "args": {},
+    "null_rate": float}, only "name" is required.
+    """
+
+    def __init__(self, columns: list[Column]):
+        if not columns:
+            raise ValueError('Схема не содержит колонок')
+        self.columns = list(columns)
+
+    @property
+    def names(self) -> tuple:
+        return tuple(column.name for column in self.columns)
+
+    @classmethod
+    def load(cls, path: str) -> 'Schema':
+        """
+        Load the schema from a json file.
+        :param path: Path to the schema file.
+        :return: Schema.
+        """
+        with open(path, encoding='utf-8') as f:
+            raw_columns = json.load(f)
+        try:
+            return cls([Column(**column) for column in raw_columns])
+        except TypeError as e:
+            logger.error(f'Schema.load - Неверное описание колонки: {e}')
+            raise ValueError(f'{path} - неверное описание колонки: {e}')
+
+    def select(self, names: list[str]) -> 'Schema':
+        """
+        Get the schema of the chosen columns in the given order.
+        :param names: Names of the columns.
+        :return: New schema.
+        """
+        columns = {column.name: column for column in self.columns}
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            logger.error(f'Schema.select - Неизвестные колонки: {unknown}')
+            raise ValueError(f'Неизвестные колонки: {unknown}')
+        return Schema([columns[name] for name in names])
+
+    def compile(self, generic: 'Generic') -> tuple[Callable, list[Callable]]:
+        """
+        Compile the schema into a function returning one row.
+        The function is generated once with the bound methods
+        as its globals, so a row costs one call per column
+        without lookups of providers, methods or arguments.
+        :param generic: Mimesis providers of the locale.
+        :return: Row function and functions of values of every column.
+        """
+        namespace = {'_random': generic.random.random}
+        values, items = [], []
+        for index, column in enumerate(self.columns):
+            values.append(column.bind(generic))
+            namespace[f'_value_{index}'] = values[-1]
+            item = f'_value_{index}()'
+            if column.null_rate:
+                item = f'(None if _random() < {column.null_rate!r} else {item})'
+            items.append(item)
+        source = f'def row():\n    return ({", ".join(items)},)\n'
+        exec(compile(source, '<schema>', 'exec'), namespace)
+        return namespace['row'], values
+
+
+DEFAULT_SCHEMA = Schema([Column(name) for name in DEFAULT_COLUMNS])
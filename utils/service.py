@@ -0,0 +1,424 @@
+"""
+Local HTTP service of generated data.
+
+GET /generate?rows=1000&format=csv&seed=42&start=0&zip=1
+
+Rows are generated and serialized in a process pool by chunks
+of SERVICE_CHUNK_ROWS rows and sent in order with chunked transfer
+encoding as soon as each chunk is ready, so the event loop only moves
+bytes between the pool and the sockets. Rows are the seekable data
+of the seed (PersonGenerator.generate_row_at): the same seed returns
+the same data, and rows=100&start=1000000 returns the same rows
+as the full data without generating the rows before them.
+Formats that cannot be joined from parts (xlsx, columnar) are created
+whole in a worker and sent after that.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import io
+import os
+import random
+import signal
+import urllib.parse
+import zipfile
+
+from mimesis import Locale
+from typing import AsyncIterator
+
+from config import (
+    logger,
+    GENERATOR_ENGINE,
+    INNER_FILENAME,
+    PACKER_READ_CHUNK_SIZE,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+    SERVICE_CHUNK_ROWS,
+    SERVICE_PREFETCH_CHUNKS,
+    SERVICE_MAX_ROWS,
+    SERVICE_HEADER_TIMEOUT,
+    ZIP_COMPRESSION_LEVEL
+)
+from utils.generator import generate_range, init_worker
+from utils.registry import file_creators
+from utils.schema import DEFAULT_SCHEMA
+
+CONTENT_TYPES = {
+    '.csv': 'text/csv; charset=utf-8',
+    '.txt': 'text/plain; charset=utf-8',
+    '.xlsx': (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    ),
+    '.zip': 'application/zip'
+}
+
+
+class ServiceError(Exception):
+    """Error of the request, sent to the client with the status."""
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _create_chunk(file_format: str, seed: int, start: int, stop: int) -> bytes:
+    """
+    Process pool task. Generates and serializes a chunk of rows.
+    :param file_format: Name of the file format.
+    :param seed: Master seed.
+    :param start: Index of the first row.
+    :param stop: Index after the last row.
+    :return: Bytes of the part of the file.
+    """
+    data_file = file_creators.get(file_format)
+    rows = generate_range(seed, start, stop)
+    return b''.join(data_file(rows).create_to_stream())
+
+
+def _create_file(file_format: str, seed: int, start: int, stop: int) -> bytes:
+    """
+    Process pool task. Generates all rows of the range
+    and creates the whole file.
+    :return: Bytes of the file.
+    """
+    def rows():
+        for chunk_start in range(start, stop, SERVICE_CHUNK_ROWS):
+            yield from generate_range(
+                seed, chunk_start, min(chunk_start + SERVICE_CHUNK_ROWS, stop)
+            )
+
+    return file_creators.get(file_format)(rows()).create().getvalue()
+
+
+def parse_request(query: str) -> dict:
+    """
+    Parse parameters of the generation request.
+    :param query: Query string: rows, format (csv by default),
+    seed (random by default), start (index of the first row, 0
+    by default), zip (1 or true).
+    :return: Parameters: rows, format, seed, start, zip.
+    """
+    params = urllib.parse.parse_qs(query)
+
+    def get(name: str, default: str = None) -> str:
+        return params.get(name, [default])[-1]
+
+    try:
+        rows = int(get('rows', ''))
+        seed = int(get('seed')) if get('seed') else None
+        start = int(get('start', '0'))
+    except ValueError:
+        raise ServiceError(
+            '400 Bad Request', 'rows, seed и start должны быть целыми числами'
+        )
+    if start < 0:
+        raise ServiceError('400 Bad Request', 'start не может быть меньше 0')
+    if not 0 < rows <= SERVICE_MAX_ROWS:
+        raise ServiceError(
+            '400 Bad Request', f'rows должно быть от 1 до {SERVICE_MAX_ROWS}'
+        )
+    file_format = get('format', 'csv')
+    if file_format not in file_creators:
+        raise ServiceError(
+            '400 Bad Request', f'Неизвестный формат файла: {file_format}'
+        )
+    return {
+        'rows': rows,
+        'format': file_format,
+        'seed': random.SystemRandom().getrandbits(64) if seed is None else seed,
+        'start': start,
+        'zip': get('zip', '0').lower() in ('1', 'true', 'yes')
+    }
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable file object keeping written bytes until taken."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class _ZipStream:
+    """
+    Zip archive of one file compressed piece by piece. The archive
+    is written to an unseekable sink, so sizes and crc follow every
+    member in a data descriptor and the compressed bytes can be sent
+    right away.
+    """
+
+    def __init__(self, inner_filename: str):
+        self._sink = _Sink()
+        self._archive = zipfile.ZipFile(
+            self._sink,
+            'w',
+            zipfile.ZIP_DEFLATED,
+            compresslevel=ZIP_COMPRESSION_LEVEL
+        )
+        self._member = self._archive.open(
+            inner_filename, 'w', force_zip64=True
+        )
+
+    def write(self, data: bytes) -> bytes:
+        """
+        Compress the data.
+        :return: Compressed bytes ready to be sent.
+        """
+        self._member.write(data)
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        """
+        Finish the archive.
+        :return: Rest of the archive.
+        """
+        self._member.close()
+        self._archive.close()
+        return self._sink.take()
+
+
+class DataService:
+    """Asyncio HTTP server streaming generated data to clients."""
+
+    def __init__(
+            self,
+            host: str = SERVICE_HOST,
+            port: int = SERVICE_PORT,
+            workers: int = SERVICE_WORKERS,
+            locale: Locale | dict[Locale, float] = Locale.RU
+    ):
+        """
+        :param host: Address to listen on.
+        :param port: Port to listen on.
+        :param workers: Number of generating processes. CPU count by default.
+        :param locale: Locale of generated data or weights of locales.
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.locale = locale
+        self._executor = None
+
+    async def serve(self) -> None:
+        """
+        Run the server until it is cancelled. SIGTERM cancels it too,
+        so the pool workers are stopped and pending chunks are dropped
+        instead of leaving orphaned processes.
+        """
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.locale, GENERATOR_ENGINE, DEFAULT_SCHEMA)
+        )
+        try:
+            server = await asyncio.start_server(
+                self._handle, self.host, self.port
+            )
+            with contextlib.suppress(NotImplementedError):
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGTERM, asyncio.current_task().cancel
+                )
+            async with server:
+                print(
+                    f'Сервис генерации данных: '
+                    f'http://{self.host}:{self.port}/generate?rows=1000'
+                )
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def _pieces(self, params: dict) -> AsyncIterator[bytes]:
+        """
+        Helper method. Parts of the file in order. Chunks are generated
+        in the pool at most SERVICE_PREFETCH_CHUNKS ahead, so a slow
+        client does not make the server keep the whole file.
+        """
+        loop = asyncio.get_running_loop()
+        seed, start = params['seed'], params['start']
+        stop = start + params['rows']
+        data_file = file_creators.get(params['format'])
+        if not data_file.CONCATENABLE:
+            data = await loop.run_in_executor(
+                self._executor,
+                _create_file,
+                params['format'],
+                seed,
+                start,
+                stop
+            )
+            view = memoryview(data)
+            for offset in range(0, len(view), PACKER_READ_CHUNK_SIZE):
+                yield view[offset:offset + PACKER_READ_CHUNK_SIZE]
+            return
+
+        pending = collections.deque()
+        try:
+            for chunk_start in range(start, stop, SERVICE_CHUNK_ROWS):
+                pending.append(loop.run_in_executor(
+                    self._executor,
+                    _create_chunk,
+                    params['format'],
+                    seed,
+                    chunk_start,
+                    min(chunk_start + SERVICE_CHUNK_ROWS, stop)
+                ))
+                if len(pending) > SERVICE_PREFETCH_CHUNKS:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _stream(
+            self,
+            writer: asyncio.StreamWriter,
+            params: dict
+    ) -> None:
+        """Helper method. Send the generated file in chunks."""
+        loop = asyncio.get_running_loop()
+        extension = file_creators.get(params['format']).EXTENSION
+        inner_filename = f'{INNER_FILENAME}{extension}'
+        archive = _ZipStream(inner_filename) if params['zip'] else None
+        filename = (
+            f'{INNER_FILENAME}.zip' if archive else inner_filename
+        )
+        writer.write(_head('200 OK', {
+            'Content-Type': CONTENT_TYPES.get(
+                '.zip' if archive else extension, 'application/octet-stream'
+            ),
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Transfer-Encoding': 'chunked',
+            'X-Seed': params['seed']
+        }))
+        await writer.drain()
+
+        async with contextlib.aclosing(self._pieces(params)) as pieces:
+            async for piece in pieces:
+                if archive:
+                    # Compression releases the GIL, the loop keeps serving.
+                    piece = await loop.run_in_executor(
+                        None, archive.write, piece
+                    )
+                await _send_chunk(writer, piece)
+        if archive:
+            await _send_chunk(writer, archive.close())
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        """Helper method. Serve one connection with one request."""
+        try:
+            try:
+                method, target = await asyncio.wait_for(
+                    _read_request(reader), SERVICE_HEADER_TIMEOUT
+                )
+                url = urllib.parse.urlsplit(target)
+                if url.path != '/generate':
+                    raise ServiceError('404 Not Found', 'Неизвестный адрес')
+                if method != 'GET':
+                    raise ServiceError(
+                        '405 Method Not Allowed', 'Поддерживается только GET'
+                    )
+                params = parse_request(url.query)
+            except ServiceError as e:
+                await _send_error(writer, e.status, str(e))
+                return
+            except (ValueError, asyncio.TimeoutError):
+                await _send_error(writer, '400 Bad Request', 'Неверный запрос')
+                return
+            await self._stream(writer, params)
+        except ConnectionError:
+            # The client has gone, chunks not started yet are cancelled.
+            pass
+        except asyncio.CancelledError:
+            # The service is stopped, the response is cut off.
+            pass
+        except Exception as e:
+            logger.error(f'{self.__class__.__qualname__} - {e!r}')
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str]:
+    """
+    Helper function. Read the request line and skip the headers.
+    :return: Method and target of the request.
+    """
+    request_line = await reader.readline()
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    while await reader.readline() not in (b'\r\n', b'\n', b''):
+        pass
+    return method, target
+
+
+def _head(status: str, headers: dict) -> bytes:
+    """Helper function. Status line and headers of the response."""
+    lines = [f'HTTP/1.1 {status}']
+    lines.extend(f'{name}: {value}' for name, value in headers.items())
+    lines.append('Connection: close')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def _send_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+    """Helper function. Send one chunk, waiting while the client is slow."""
+    if not data:
+        return
+    writer.write(f'{len(data):X}\r\n'.encode())
+    writer.write(data)
+    writer.write(b'\r\n')
+    await writer.drain()
+
+
+async def _send_error(
+        writer: asyncio.StreamWriter,
+        status: str,
+        message: str
+) -> None:
+    """Helper function. Send the error response."""
+    body = message.encode('utf-8')
+    writer.write(_head(status, {
+        'Content-Type': 'text/plain; charset=utf-8',
+        'Content-Length': len(body)
+    }))
+    writer.write(body)
+    await writer.drain()
+
+
+def run_service(
+        host: str = SERVICE_HOST,
+        port: int = SERVICE_PORT,
+        workers: int = SERVICE_WORKERS,
+        locale: Locale | dict[Locale, float] = None
+) -> None:
+    """
+    Run the service until interrupted or terminated by SIGTERM.
+    :param host: Address to listen on.
+    :param port: Port to listen on.
+    :param workers: Number of generating processes. CPU count by default.
+    :param locale: Locale of generated data or weights of locales,
+    Locale.RU by default.
+    """
+    with contextlib.suppress(KeyboardInterrupt, asyncio.CancelledError):
+        asyncio.run(
+            DataService(host, port, workers, locale or Locale.RU).serve()
+        )
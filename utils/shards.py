@@ -0,0 +1,224 @@
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import os
+
+from typing import Generator
+
+from config import (
+    logger,
+    OUTPUT_DIR,
+    PACKER_READ_CHUNK_SIZE,
+    SHARD_BATCH_ROWS,
+    VERIFY_ARCHIVE
+)
+from utils.file_creator import IFileCreator
+from utils.packer import IPacker
+
+
+def _sha256(path: str) -> str:
+    """Helper function. Checksum of the file."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(PACKER_READ_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class _CountingIterator:
+    """Helper class. Iterator counting the items taken from it."""
+
+    def __init__(self, items):
+        self._items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._items)
+        self.count += 1
+        return item
+
+
+class ShardWriter:
+    """
+    Writes rows into a series of files output-00001.csv,
+    output-00002.csv, ... limited by the number of rows or bytes,
+    so the size of every file and the memory stay bounded
+    at any total number of rows.
+    A manifest with row ranges and checksums of the shards
+    is saved as output-manifest.json.
+    """
+
+    def __init__(
+            self,
+            data: list | Generator,
+            data_file: type[IFileCreator],
+            file_extension: str,
+            filename: str,
+            rows_per_shard: int = None,
+            bytes_per_shard: int = None,
+            packer: type[IPacker] = None,
+            output_dir: str = OUTPUT_DIR,
+            first_row: int = 0,
+            seed: int = None,
+            verify: bool = VERIFY_ARCHIVE
+    ):
+        """
+        :param file_extension: Extension of the shard files.
+        :param rows_per_shard: Maximum number of rows in a shard.
+        :param bytes_per_shard: Maximum size of a shard. A shard exceeds
+        it only if one batch of SHARD_BATCH_ROWS rows is larger.
+        Only for formats that can be concatenated, like csv and txt.
+        :param packer: Packer to archive every shard as it is completed.
+        :param first_row: Index of the first row of the data, row ranges
+        of the manifest start from it.
+        :param seed: Master seed of the seekable data, saved
+        in the manifest, so a single shard can be generated again
+        from its row range.
+        :param verify: Check the archive of every shard before the shard
+        file is deleted.
+        """
+        if bool(rows_per_shard) == bool(bytes_per_shard):
+            raise ValueError(
+                'Укажите rows_per_shard или bytes_per_shard'
+            )
+        if bytes_per_shard and not data_file.CONCATENABLE:
+            logger.error(
+                f'{self.__class__.__qualname__} - формат '
+                f'{data_file.__qualname__} не делится по размеру'
+            )
+            raise ValueError(
+                f'Формат {file_extension} делится только по числу строк'
+            )
+        self.data = data
+        self.data_file = data_file
+        self.file_extension = file_extension
+        self.filename = filename
+        self.rows_per_shard = rows_per_shard
+        self.bytes_per_shard = bytes_per_shard
+        self.packer = packer
+        self.output_dir = output_dir
+        self.first_row = first_row
+        self.seed = seed
+        self.verify = verify
+
+    def _shard_name(self, index: int) -> str:
+        """Helper method. Name of the shard without extension."""
+        return f'{self.filename}-{index:05d}'
+
+    def _write_rows_shards(self) -> Generator:
+        """
+        Helper method. Write shards of rows_per_shard rows. Rows are
+        passed to the file creator as an iterator, so a shard is not
+        kept in memory.
+        :return: Generator of shard names and numbers of rows.
+        """
+        rows = iter(self.data)
+        for index in itertools.count(1):
+            first_row = next(rows, None)
+            if first_row is None:
+                return
+            shard_rows = _CountingIterator(itertools.chain(
+                [first_row], itertools.islice(rows, self.rows_per_shard - 1)
+            ))
+            name = self._shard_name(index)
+            self.data_file(shard_rows, name, self.output_dir).create()
+            yield name, shard_rows.count
+
+    def _write_bytes_shards(self) -> Generator:
+        """
+        Helper method. Write shards of at most bytes_per_shard bytes,
+        serializing rows in batches and starting a new shard
+        when the next batch does not fit.
+        :return: Generator of shard names and numbers of rows.
+        """
+        rows = iter(self.data)
+        index, shard_file, shard_size, shard_rows = 0, None, 0, 0
+        try:
+            while batch := list(itertools.islice(rows, SHARD_BATCH_ROWS)):
+                piece = b''.join(self.data_file(batch).create_to_stream())
+                if shard_file is None or (
+                        shard_size
+                        and shard_size + len(piece) > self.bytes_per_shard
+                ):
+                    if shard_file:
+                        shard_file.close()
+                        yield self._shard_name(index), shard_rows
+                    index += 1
+                    shard_file = open(
+                        f'{self.output_dir}/{self._shard_name(index)}'
+                        f'{self.file_extension}',
+                        'wb'
+                    )
+                    shard_size, shard_rows = 0, 0
+                shard_file.write(piece)
+                shard_size += len(piece)
+                shard_rows += len(batch)
+        finally:
+            if shard_file:
+                shard_file.close()
+        if shard_file:
+            yield self._shard_name(index), shard_rows
+
+    def _archive_shard(self, name: str) -> str:
+        """Helper method. Pack the shard into its own archive."""
+        self.packer(
+            [f'{name}{self.file_extension}'],
+            name,
+            source_dir=self.output_dir,
+            path_output_files=self.output_dir,
+            verify=self.verify
+        ).create_archive(delete_after=True)
+        return name
+
+    def create(self) -> list[dict]:
+        """
+        Write all shards and the manifest. Archiving of a completed
+        shard runs in the background while the next one is written.
+        :return: Shards from the manifest.
+        """
+        shards_iter = (
+            self._write_rows_shards()
+            if self.rows_per_shard
+            else self._write_bytes_shards()
+        )
+        shards, archives, first_row = [], [], self.first_row
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            for name, rows in shards_iter:
+                path = f'{self.output_dir}/{name}{self.file_extension}'
+                shards.append({
+                    'file': f'{name}{self.file_extension}',
+                    'first_row': first_row,
+                    'last_row': first_row + rows - 1,
+                    'rows': rows,
+                    'size': os.path.getsize(path),
+                    'sha256': _sha256(path)
+                })
+                first_row += rows
+                if self.packer:
+                    archives.append(
+                        executor.submit(self._archive_shard, name)
+                    )
+            for shard, archive in zip(shards, archives):
+                archive.result()
+                shard['archived'] = True
+
+        manifest = {'rows': first_row - self.first_row}
+        if self.seed is not None:
+            manifest['seed'] = self.seed
+        manifest['shards'] = shards
+        with open(
+                f'{self.output_dir}/{self.filename}-manifest.json',
+                'w',
+                encoding='utf-8'
+        ) as f:
+            json.dump(
+                manifest,
+                f,
+                ensure_ascii=False,
+                indent=2
+            )
+        return shards
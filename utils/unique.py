@@ -0,0 +1,224 @@
+import array
+import hashlib
+
+from typing import Callable, Iterable, Iterator, TYPE_CHECKING
+
+from config import logger, UNIQUE_STRATEGY, UNIQUE_RESAMPLE_ATTEMPTS
+
+if TYPE_CHECKING:
+    from utils.generator import PersonGenerator
+
+STRATEGIES = ('suffix', 'resample')
+
+
+def _digest(value) -> int:
+    """Helper function. Non-zero 64-bit digest of the value."""
+    digest = hashlib.blake2b(
+        str(value).encode('utf-8'), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class DigestSet:
+    """
+    Compact set of values stored as 64-bit digests in an open addressing
+    table: 16 to 32 bytes per value, so tens of millions of values
+    fit in hundreds of megabytes.
+    Two different values with the same digest are taken as equal:
+    a value may be rejected as a duplicate by mistake, but a duplicate
+    is never accepted.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: Expected number of values. The table grows
+        when it is exceeded.
+        """
+        size = 16
+        while size < capacity * 2:
+            size *= 2
+        self._table = array.array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _slot(self, digest: int) -> int:
+        """Helper method. Slot of the digest or of the first free cell."""
+        table, mask = self._table, self._mask
+        index = digest & mask
+        while table[index] and table[index] != digest:
+            index = (index + 1) & mask
+        return index
+
+    def _grow(self) -> None:
+        """Helper method. Double the table and reinsert digests."""
+        old_table = self._table
+        self._table = array.array('Q', bytes(16 * len(old_table)))
+        self._mask = len(self._table) - 1
+        for digest in old_table:
+            if digest:
+                self._table[self._slot(digest)] = digest
+
+    def __contains__(self, value) -> bool:
+        digest = _digest(value)
+        return self._table[self._slot(digest)] == digest
+
+    def add(self, value) -> bool:
+        """
+        Add the value.
+        :return: False if the value is already in the set.
+        """
+        digest = _digest(value)
+        index = self._slot(digest)
+        if self._table[index]:
+            return False
+        self._table[index] = digest
+        self._len += 1
+        if self._len * 2 > len(self._table):
+            self._grow()
+        return True
+
+
+def _with_suffix(value: str, suffix: int) -> str:
+    """Helper function. Value with the number, before '@' in emails."""
+    local, at, domain = value.partition('@')
+    return f'{local}{suffix}{at}{domain}'
+
+
+class UniqueFilter:
+    """
+    Makes values of the selected columns unique across the stream
+    of rows. Duplicates are replaced with a resampled value or with
+    the value with the smallest free number suffix, so the result
+    depends only on the incoming rows.
+    The filter must see all rows of the job in their order: with
+    sharded or parallel generation it is applied to the merged stream.
+    """
+
+    def __init__(
+            self,
+            columns: list[int],
+            strategy: str = UNIQUE_STRATEGY,
+            resample: Callable[[int], str] = None,
+            attempts: int = UNIQUE_RESAMPLE_ATTEMPTS,
+            capacity: int = 1024,
+            reseed: Callable[[int], None] = None
+    ):
+        """
+        :param columns: Indexes of the unique columns.
+        :param strategy: 'suffix' or 'resample'.
+        :param resample: Function returning a new value of the column
+        by its index. Required for 'resample'.
+        :param attempts: Number of resampling attempts before falling back
+        to the suffix.
+        :param capacity: Expected number of rows.
+        :param reseed: Function reseeding the random generator
+        of resample by the number of the row in the stream, called
+        before resampling values of the row, so resampled values depend
+        only on the rows and not on how they were generated.
+        """
+        if strategy not in STRATEGIES:
+            logger.error(
+                f'{self.__class__.__qualname__} - '
+                f'Неизвестная стратегия уникальности: {strategy}'
+            )
+            raise ValueError(f'Неизвестная стратегия уникальности: {strategy}')
+        if strategy == 'resample' and resample is None:
+            raise ValueError('Для стратегии resample нужна функция resample')
+        self.columns = [(index, DigestSet(capacity)) for index in columns]
+        self.strategy = strategy
+        self.resample = resample
+        self.attempts = attempts
+        self.reseed = reseed
+        self.duplicates = 0
+        # Number of rows filtered, across calls of apply.
+        self.rows = 0
+        # Last used suffix of duplicated values only.
+        self._suffixes = [{} for _ in columns]
+
+    def _replace(self, column: int, seen: DigestSet, value) -> str:
+        """Helper method. New unique value instead of the duplicate."""
+        self.duplicates += 1
+        if self.strategy == 'resample':
+            for _ in range(self.attempts):
+                new_value = self.resample(self.columns[column][0])
+                if seen.add(new_value):
+                    return new_value
+        suffixes = self._suffixes[column]
+        suffix = suffixes.get(value, 0)
+        while True:
+            suffix += 1
+            new_value = _with_suffix(str(value), suffix)
+            if seen.add(new_value):
+                suffixes[value] = suffix
+                return new_value
+
+    def apply(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        Filter the rows.
+        :param rows: Rows of random data.
+        :return: Iterator of rows with unique values of the columns.
+        """
+        for row in rows:
+            new_row = None
+            for column, (index, seen) in enumerate(self.columns):
+                if not seen.add(row[index]):
+                    if new_row is None:
+                        new_row = list(row)
+                        if self.reseed and self.strategy == 'resample':
+                            self.reseed(self.rows)
+                    new_row[index] = self._replace(column, seen, row[index])
+            self.rows += 1
+            yield row if new_row is None else tuple(new_row)
+
+
+def create_unique_filter(
+        unique: list[str],
+        person_generator: 'PersonGenerator',
+        strategy: str = UNIQUE_STRATEGY,
+        capacity: int = 1024,
+        seed: int = None,
+        start_row: int = 0
+) -> UniqueFilter:
+    """
+    Create the filter of unique columns of person data.
+    With the seed duplicates are resampled by a separate generator
+    reseeded for every row by the seed and the index of the row,
+    so the output of the seed does not depend on the generation
+    of the rows: the same in any run, with any number of workers.
+    :param unique: Names of the columns of the generator schema.
+    :param person_generator: Generator used to resample duplicates.
+    :param strategy: 'suffix' or 'resample'.
+    :param capacity: Expected number of rows.
+    :param seed: Master seed of the rows.
+    :param start_row: Index of the first row of the stream.
+    :return: Filter of rows.
+    """
+    try:
+        columns = [person_generator.columns.index(column) for column in unique]
+    except ValueError:
+        logger.error(f'create_unique_filter - Неизвестная колонка: {unique}')
+        raise ValueError(f'Неизвестная колонка: {unique}')
+    reseed = None
+    if seed is not None and strategy == 'resample':
+        from utils.generator import create_person_generator
+
+        person_generator = create_person_generator(
+            person_generator.locale,
+            person_generator.engine,
+            person_generator.schema
+        )
+
+        def reseed(row: int) -> None:
+            person_generator.reseed(
+                _digest(f'{seed}:unique:{start_row + row}')
+            )
+    return UniqueFilter(
+        columns,
+        strategy,
+        resample=person_generator.generate_value,
+        capacity=capacity,
+        reseed=reseed
+    )
@@ -3,7 +3,7 @@ import os
 import utils.messages as msg
 import utils.validator as validator
 
-from config import logger, INPUT_DIR
+from config import logger, INPUT_DIR, MAX_LINES_WITHOUT_SHARDS, SHARD_ROWS
 from utils.models import WorkFormat, FileFormat, PackerFormat, PackerType
 
 
@@ -17,7 +17,9 @@ class UserData:
             files_for_packer: list = None,
             packer_format: PackerFormat = None,
             packer_type: PackerType = None,
-            max_size_mb: int = None
+            max_size_mb: int = None,
+            rows_per_shard: int = None,
+            shard_size_mb: int = None
     ):
         self.work_format = work_format
         self.number_of_lines = number_of_lines
@@ -26,6 +28,8 @@ class UserData:
         self.packer_format = packer_format
         self.packer_type = packer_type
         self.max_size_mb = max_size_mb
+        self.rows_per_shard = rows_per_shard
+        self.shard_size_mb = shard_size_mb
 
     def _get_packer_format_for_generator(self):
         """Helper method to getting the packer format for generator"""
@@ -93,13 +97,19 @@ class UserData:
             number_of_lines = input(
                 '\nВведите количество строк для генерации\n> '
             ).strip()
-            if not (number_of_lines.isdigit() and 1 <= int(number_of_lines) <= 2000000):
+            if not (number_of_lines.isdigit() and int(number_of_lines) >= 1):
                 print(
                     'Неверный ввод. Введите положительное целое число '
-                    'от 1 до 2_000_000 лишних символов.\n'
+                    'без лишних символов.\n'
                 )
             else:
                 self.number_of_lines = int(number_of_lines)
+                if self.number_of_lines > MAX_LINES_WITHOUT_SHARDS:
+                    self.rows_per_shard = SHARD_ROWS
+                    print(
+                        f'Данные будут разбиты на файлы '
+                        f'по {SHARD_ROWS:_} строк.'
+                    )
                 return
 
     def get_data_file_format(self):
@@ -130,31 +140,22 @@ class UserData:
         action()
 
     def get_files_for_packer(self):
-        """Get list of files for packer"""
-        while True:
-            self._check_input_dir()
-            for file in self.files_for_packer:
-                file_path = os.path.join(f'./{INPUT_DIR}', file)
-                if os.path.isdir(file_path):
-                    logger.debug(
-                        f'get_files_for_packer - В папке "{INPUT_DIR}" '
-                        f'обнаружен вложенный каталог "{file}".')
-                    print(
-                        f'В папке "{INPUT_DIR}" обнаружен вложенный '
-                        f'каталог "{file}". Удалите его.'
-                    )
-                else:
-                    print(
-                        f'Перечисленные ниже файлы будут заархивированы:\n '
-                        f'{'\n'.join(self.files_for_packer)}\n'
-                    )
-                    return
+        """Get list of files and directories for packer"""
+        self._check_input_dir()
+        files = '\n'.join(
+            f'{file}/' if os.path.isdir(os.path.join(f'./{INPUT_DIR}', file))
+            else file
+            for file in self.files_for_packer
+        )
+        print(
+            f'Перечисленные ниже файлы и каталоги со всем содержимым '
+            f'будут заархивированы:\n{files}\n'
+        )
 
     def get_packer_type(self):
         """Get the packer type"""
         while True:
-            if (self.packer_format == PackerFormat.NO_PACKER
-                    or self.packer_format == PackerFormat.ZIP):
+            if self.packer_format == PackerFormat.NO_PACKER:
                 return
 
             text = 'Выберите тип архивации:'
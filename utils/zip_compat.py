@@ -0,0 +1,145 @@
+"""
+Undocumented zipfile internals used by the zip packer.
+
+zipfile has no public API to write already compressed data,
+to copy a member without decompressing it or to read the end record
+of a split archive, so the packer uses its internals. They are used
+only through this module, checked with Python 3.11 to 3.13: if one
+of them is missing in another version, importing the module fails
+with the list of the missing names instead of writing broken archives.
+"""
+import io
+import struct
+import zipfile
+
+from config import logger
+
+_REQUIRED = {
+    zipfile: (
+        '_get_compressor', '_EndRecData', '_ECD_DISK_START',
+        '_FH_FILENAME_LENGTH', '_FH_EXTRA_FIELD_LENGTH'
+    ),
+    zipfile.ZipInfo: ('_encodeFilenameFlags', '_compresslevel'),
+}
+# Attributes of ZipFile objects.
+_REQUIRED_ZIP_FILE = (
+    'fp', 'filelist', 'NameToInfo', 'start_dir', '_didModify'
+)
+
+
+def missing_internals() -> list[str]:
+    """
+    Names of the required zipfile internals missing in this Python.
+    :return: List of names.
+    """
+    missing = [
+        f'{getattr(owner, "__name__", owner)}.{name}'
+        for owner, names in _REQUIRED.items()
+        for name in names
+        if not hasattr(owner, name)
+    ]
+    with zipfile.ZipFile(io.BytesIO(), 'w') as zip_file:
+        missing.extend(
+            f'ZipFile.{name}'
+            for name in _REQUIRED_ZIP_FILE
+            if not hasattr(zip_file, name)
+        )
+    return missing
+
+
+def check_internals() -> None:
+    """Fail if zipfile of this Python lacks the required internals."""
+    missing = missing_internals()
+    if missing:
+        logger.error(
+            f'zip_compat - zipfile не содержит {", ".join(missing)}'
+        )
+        raise ImportError(
+            f'Версия zipfile не поддерживается, нет: {", ".join(missing)}'
+        )
+
+
+check_internals()
+
+
+def get_compressor(compress_type: int, compresslevel: int = None):
+    """
+    Compressor object of the method, the one ZipFile uses.
+    :return: Object with compress and flush, None for stored data.
+    """
+    return zipfile._get_compressor(compress_type, compresslevel)
+
+
+def strip_extra(extra: bytes, ids: tuple) -> bytes:
+    """Extra field without the records of the ids."""
+    records, position = [], 0
+    while position + 4 <= len(extra):
+        record_id, size = struct.unpack_from('<HH', extra, position)
+        end = position + 4 + size
+        if record_id not in ids:
+            records.append(extra[position:end])
+        position = end
+    return b''.join(records)
+
+
+def encode_filename_flags(zinfo: zipfile.ZipInfo) -> tuple[bytes, int]:
+    """Encoded filename and flag bits of the member, utf-8 flag included."""
+    return zinfo._encodeFilenameFlags()
+
+
+def set_compresslevel(zinfo: zipfile.ZipInfo, compresslevel: int) -> None:
+    """Compression level used by ZipFile.open(zinfo, 'w')."""
+    zinfo._compresslevel = compresslevel
+
+
+def central_directory_disk(file: io.IOBase) -> int:
+    """
+    Number of the disk of the central directory from the end records.
+    :param file: Seekable file of the archive.
+    """
+    return zipfile._EndRecData(file)[zipfile._ECD_DISK_START]
+
+
+def open_raw_member(
+        zip_file: zipfile.ZipFile,
+        zinfo: zipfile.ZipInfo
+) -> io.IOBase:
+    """
+    File of the archive positioned at the compressed data of the member.
+    The next zinfo.compress_size bytes are the data.
+    """
+    fp = zip_file.fp
+    fp.seek(zinfo.header_offset)
+    header = struct.unpack(
+        zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader)
+    )
+    fp.seek(
+        header[zipfile._FH_FILENAME_LENGTH]
+        + header[zipfile._FH_EXTRA_FIELD_LENGTH],
+        io.SEEK_CUR
+    )
+    return fp
+
+
+def write_raw_member(
+        zip_file: zipfile.ZipFile,
+        zinfo: zipfile.ZipInfo,
+        compressed: io.IOBase,
+        chunk_size: int
+) -> None:
+    """
+    Write already compressed member to the archive open for writing,
+    the way ZipFile writes its own members.
+    :param zinfo: Member info with CRC and sizes of the data.
+    :param compressed: File object of the compressed data.
+    :param chunk_size: Size of the chunks of copying.
+    """
+    fp = zip_file.fp
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader())
+    while chunk := compressed.read(chunk_size):
+        fp.write(chunk)
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+    zip_file.start_dir = fp.tell()
+    zip_file._didModify = True